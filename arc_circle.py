@@ -11,9 +11,15 @@ RED   = (255,  80,  80)
 RAYON_DEPART      = 100
 ECART_RAYON       = 12
 OUVERTURE_DEGREES = 300
+ROTATION_SPEED    = math.radians(25)
+CONTACT_EPSILON   = 1e-9
 
 
 class ArcCircle:
+    # __slots__ : pas de dictionnaire par anneau (des milliers d'instances)
+    __slots__ = ("center", "radius", "start_angle", "end_angle", "color", "width", "broken",
+                 "midi_manager")
+
     def __init__(self, center, radius, start_angle, end_angle, color, width=4, midi_manager=None):
         self.center = Vector2(center)
         self.radius = radius
@@ -27,9 +33,8 @@ class ArcCircle:
 
 
     def rotate(self, dt):
-        rotation_speed = math.radians(25)
-        self.start_angle = (self.start_angle - rotation_speed * dt) % (2 * math.pi)
-        self.end_angle   = (self.end_angle   - rotation_speed * dt) % (2 * math.pi)
+        self.start_angle = (self.start_angle - ROTATION_SPEED * dt) % (2 * math.pi)
+        self.end_angle   = (self.end_angle   - ROTATION_SPEED * dt) % (2 * math.pi)
 
     def shrink(self, dt):
         if not self.broken and self.radius > RAYON_DEPART:
@@ -45,10 +50,12 @@ class ArcCircle:
         pygame.draw.arc(surface, self.color, rect,
                         self.start_angle, self.end_angle, self.width)
 
-    def is_in_hole(self, pos):
+    def is_in_hole(self, pos, delay=0.0):
+        # delay : temps écoulé depuis la dernière rotation. L'anneau a tourné de
+        # -ROTATION_SPEED * delay, ce qui revient à tourner le point en sens inverse
         dx = pos.x - self.center.x
         dy = self.center.y - pos.y
-        angle = math.atan2(dy, dx) % (2 * math.pi)
+        angle = (math.atan2(dy, dx) + ROTATION_SPEED * delay) % (2 * math.pi)
         start = self.start_angle
         end = self.end_angle
         if start < end:
@@ -56,27 +63,33 @@ class ArcCircle:
         else:
             in_drawn = (angle >= start or angle <= end)
         return not in_drawn
-    
-
-    def check_wall_cercle_collision(self, balle):
-        if self.broken:
-            return False
-
-        offset = balle.pos - self.center
-        distance = offset.length()
-
-        if distance + balle.radius > self.radius:
-            if self.is_in_hole(balle.pos):
-                self.broken = True
-                return True
-            else:
-                normal = offset.normalize()
-                balle.vel = balle.vel.reflect(normal) * balle.restitution
-                overlap = (distance + balle.radius) - self.radius
-                balle.pos -= normal * overlap
-
-                if self.midi_manager:
-                    self.midi_manager.play_next_note()
-
-        return False
 
+    def time_of_impact(self, p0, p1, ball_radius):
+        # Fraction s du trajet [p0, p1] à laquelle la balle touche l'intérieur
+        # de l'anneau : |p0 + s * (p1 - p0) - centre| = rayon - rayon de la balle
+        contact = self.radius - ball_radius
+        ox = p0.x - self.center.x
+        oy = p0.y - self.center.y
+        dx = p1.x - p0.x
+        dy = p1.y - p0.y
+        a = dx * dx + dy * dy
+        b = ox * dx + oy * dy
+        c = ox * ox + oy * oy - contact * contact
+
+        # Déjà au contact au départ (l'anneau a pu rétrécir sur la balle) ; la
+        # tolérance évite de retoucher un anneau sur lequel on vient d'être replacé
+        if c > CONTACT_EPSILON * contact * contact or (c >= 0 and b > 0):
+            return 0.0
+        if a == 0:
+            return None
+        disc = b * b - a * c
+        if disc < 0:
+            return None
+        s = (-b + math.sqrt(disc)) / a
+        return s if s <= 1.0 else None
+
+    def bounce(self, balle, normal):
+        # Rebond sur la partie pleine au point de contact (normale sortante) ;
+        # la note est jouée après le pas (collision_events.MidiConsumer)
+        if balle.vel.dot(normal) > 0:
+            balle.vel = balle.vel.reflect(normal) * balle.restitution
@@ -0,0 +1,187 @@
+import math
+import numpy as np
+from pygame.math import Vector2
+from arc_circle import ArcCircle, RAYON_DEPART, ROTATION_SPEED
+from arc_raster import ArcRaster
+
+DEUX_PI        = 2 * math.pi
+SHRINK_SPEED   = 200
+RAYON_VISIBLE  = 800
+
+
+class ArcField:
+    # Tous les anneaux concentriques rangés en tableaux NumPy contigus
+    # (structure de tableaux), par rayon croissant. Tous tournent à la même
+    # vitesse et rétrécissent ensemble : on ne garde que leur phase et leur
+    # rayon de départ, plus deux scalaires (rotation et rétrécissement
+    # cumulés). rotate/shrink sont en O(1) ; angles et rayons ne sont calculés
+    # que pour les anneaux testés ou dessinés. Un anneau cassé n'est plus ni
+    # testé ni dessiné : ses valeurs suivent la même loi.
+    def __init__(self, center, radii, start_angles, end_angles, colors, width=4, midi_manager=None):
+        ordre = np.argsort(np.asarray(radii, dtype=np.float64), kind="stable")
+        colors = list(colors)
+
+        self.center       = Vector2(center)
+        self.base_radius  = np.asarray(radii, dtype=np.float64)[ordre]
+        self.phase_start  = np.mod(np.asarray(start_angles, dtype=np.float64)[ordre], DEUX_PI)
+        self.phase_end    = np.mod(np.asarray(end_angles,   dtype=np.float64)[ordre], DEUX_PI)
+        self.turn         = 0.0  # rotation cumulée (rad)
+        self.shrunk       = 0.0  # rétrécissement cumulé (px)
+        self.width        = np.full(len(self.base_radius), width, dtype=np.int32)
+        self.max_width    = width if len(self.base_radius) else 0  # borne de width.max()
+        self.broken       = np.zeros(len(self.base_radius), dtype=bool)
+        self.core         = 0  # anneaux 0..core-1 cassés (curseur de RingIndex)
+        self.colors       = [colors[i] for i in ordre.tolist()]
+        self.midi_manager = midi_manager
+        self.version      = 0  # incrémenté à chaque changement visible (affichage partiel)
+        self.layout       = 0  # incrémenté quand la forme change (tout sauf la rotation)
+        self.raster       = ArcRaster()  # tampons de sommets du dessin
+
+        self.views = [ArcView(self, i) for i in range(len(self.base_radius))]
+
+    def __len__(self):
+        return len(self.views)
+
+    def __getitem__(self, i):
+        return self.views[i]
+
+    def __iter__(self):
+        return iter(self.views)
+
+    # ---------- cinématique ----------
+    def radii(self, rings=slice(None)):
+        # Rayons des anneaux rings (tranche ou indices)
+        return np.maximum(self.base_radius[rings] - self.shrunk, RAYON_DEPART)
+
+    def angles(self, rings=slice(None)):
+        # Angles de départ et de fin des anneaux rings (tranche ou indices)
+        return (np.mod(self.phase_start[rings] - self.turn, DEUX_PI),
+                np.mod(self.phase_end[rings] - self.turn, DEUX_PI))
+
+    @property
+    def radius(self):
+        return self.radii()
+
+    @property
+    def start_angle(self):
+        return self.angles()[0]
+
+    @property
+    def end_angle(self):
+        return self.angles()[1]
+
+    def rotate(self, dt):
+        self.version += 1
+        self.turn += ROTATION_SPEED * dt
+
+    def shrink(self, dt):
+        # Tant qu'un anneau dépasse RAYON_DEPART (le plus grand est le dernier)
+        if len(self.base_radius) and self.base_radius[-1] - self.shrunk > RAYON_DEPART:
+            self.version += 1
+            self.layout += 1
+            self.shrunk += SHRINK_SPEED * dt
+
+    def explode(self, orig_radii, orig_widths, coef):
+        # Phase "explode_arcs" : les anneaux grossissent et s'épaississent
+        self.version += 1
+        self.layout += 1
+        np.multiply(orig_radii, 1 + 7 * coef, out=self.base_radius)
+        self.shrunk = 0.0
+        np.add(orig_widths, int(20 * coef), out=self.width)
+        self.max_width = int(self.width.max()) if len(self.width) else 0
+
+    def visible(self, far=RAYON_VISIBLE, near=0.0):
+        # Indices des anneaux intacts de rayon compris entre near et far. Le
+        # coeur d'anneaux déjà cassés (jusqu'à core) et les anneaux trop
+        # grands ne sont pas calculés.
+        lo = self.core
+        if near > RAYON_DEPART:
+            lo = max(lo, int(np.searchsorted(self.base_radius, near + self.shrunk, side="left")))
+        hi = int(np.searchsorted(self.base_radius, far + self.shrunk, side="right"))
+        radii = self.radii(slice(lo, hi))
+        return lo + np.flatnonzero(~self.broken[lo:hi] & (radii >= near) & (radii <= far))
+
+    def in_view(self, rect, center=None):
+        # Anneaux visibles qui recoupent rect, le champ étant centré en center
+        # (défaut : self.center) ; un anneau de rayon r et d'épaisseur w
+        # occupe la couronne [r - w, r]
+        cx, cy = self.center if center is None else center
+        dx = max(rect.left - cx, 0, cx - rect.right)
+        dy = max(rect.top - cy, 0, cy - rect.bottom)
+        coin_x = max(abs(rect.left - cx), abs(rect.right - cx))
+        coin_y = max(abs(rect.top - cy), abs(rect.bottom - cy))
+        far = math.hypot(coin_x, coin_y) + self.max_width
+        return self.visible(min(far, RAYON_VISIBLE), math.hypot(dx, dy))
+
+    def draw(self, surface, indices=None, center=None, rects=None):
+        # indices : anneaux à dessiner (défaut : ceux qui recoupent la
+        # surface) ; center : centre des anneaux sur la surface ; rects :
+        # zones à redessiner (défaut : toute la surface)
+        cx, cy = (int(self.center.x), int(self.center.y)) if center is None else center
+        if indices is None:
+            indices = self.in_view(surface.get_rect(), (cx, cy))
+        if len(indices):
+            self.raster.draw(surface, self, indices, (cx, cy), rects)
+
+    def rotation_rects(self, surface, turn):
+        # Zones de surface que draw modifie si le champ n'a que tourné depuis
+        # turn (None : tout redessiner)
+        cx, cy = int(self.center.x), int(self.center.y)
+        return self.raster.rotation_rects(self, self.in_view(surface.get_rect(), (cx, cy)), (cx, cy), turn)
+
+
+class ArcView(ArcCircle):
+    # Vue sur un anneau du champ : même interface qu'un ArcCircle, mais les
+    # valeurs sont lues directement dans les tableaux du champ. Seul broken
+    # s'écrit par la vue ; la forme (rayons, angles, épaisseurs, couleurs)
+    # ne change que par les méthodes d'ArcField, qui gardent l'ordre des
+    # rayons, core et max_width à jour
+    __slots__ = ("field", "index")
+
+    def __init__(self, field, index):
+        self.field = field
+        self.index = index
+
+    def __reduce__(self):
+        # Les propriétés masquent les slots d'ArcCircle : on ne pickle que le lien
+        return ArcView, (self.field, self.index)
+
+    @property
+    def center(self):
+        return self.field.center
+
+    @property
+    def radius(self):
+        field = self.field
+        radius = float(field.base_radius[self.index]) - field.shrunk
+        return radius if radius > RAYON_DEPART else float(RAYON_DEPART)
+
+    @property
+    def start_angle(self):
+        return (float(self.field.phase_start[self.index]) - self.field.turn) % DEUX_PI
+
+    @property
+    def end_angle(self):
+        return (float(self.field.phase_end[self.index]) - self.field.turn) % DEUX_PI
+
+    @property
+    def width(self):
+        return int(self.field.width[self.index])
+
+    @property
+    def broken(self):
+        return bool(self.field.broken[self.index])
+
+    @broken.setter
+    def broken(self, value):
+        self.field.broken[self.index] = value
+        self.field.version += 1
+        self.field.layout += 1
+
+    @property
+    def color(self):
+        return self.field.colors[self.index]
+
+    @property
+    def midi_manager(self):
+        return self.field.midi_manager
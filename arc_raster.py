@@ -0,0 +1,216 @@
+import gc
+import math
+import numpy as np
+import pygame
+
+DEUX_PI = 2 * math.pi
+
+# Tables trigonométriques : 2**TABLE_BITS points sur le cercle ; un niveau de
+# détail L n'en prend qu'un sur 2**(TABLE_BITS - L)
+TABLE_BITS = 14
+MIN_BITS   = 3
+TABLE_COS  = np.cos(np.arange(1 << TABLE_BITS) * (DEUX_PI / (1 << TABLE_BITS)))
+TABLE_SIN  = np.sin(np.arange(1 << TABLE_BITS) * (DEUX_PI / (1 << TABLE_BITS)))
+
+# Ecart maximal (px) entre un segment et l'arc : choisit le niveau de détail
+SAGITTA = 0.25
+
+# pygame.draw.lines épaissit selon l'axe secondaire de chaque segment : sur un
+# cercle, l'épaisseur perpendiculaire moyenne n'est que 2*sqrt(2)/pi de width
+EPAISSEUR = math.pi / (2 * math.sqrt(2))
+
+
+def detail_bits(radii):
+    # Niveau de détail de chaque anneau : 2**L segments sur le cercle complet,
+    # assez pour que la flèche d'un segment (r * pas**2 / 8) reste sous SAGITTA
+    segments = DEUX_PI * np.sqrt(np.maximum(radii, 1.0) / (8 * SAGITTA))
+    return np.clip(np.ceil(np.log2(segments)), MIN_BITS, TABLE_BITS).astype(np.int64)
+
+
+class ArcRaster:
+    # Tracé des arcs d'un ArcField en lignes brisées épaisses
+    # (pygame.draw.lines) : pas de trous ni de moiré comme avec
+    # pygame.draw.arc, et bien moins de pixels calculés. Les sommets viennent
+    # des tables (les extrémités, exactes, sont calculées) ; leur nombre suit
+    # le rayon à l'écran. Les tampons de sommets (anneau, rang, niveau, rayon
+    # de chaque sommet) ne dépendent que de la forme du champ : ils sont
+    # gardés tant qu'ArcField.layout ne change pas, chaque image ne fait que
+    # décaler les indices dans la table selon la rotation. Les sommets de tous
+    # les anneaux d'une couleur sont calculés ensemble, puis un appel par
+    # anneau les dessine, couleur par couleur.
+    def __init__(self):
+        self.key = None
+        self.zones = None  # masque des pixels proches des zones à redessiner
+
+    def prepare(self, field, indices):
+        # Tampons de sommets des anneaux indices, par couleur
+        self.key = (field.layout, indices.tobytes())
+        radii = field.radii(indices)
+        widths = field.width[indices]
+        starts, ends = field.angles(indices)
+        spans = np.mod(ends - starts, DEUX_PI)
+        bits = detail_bits(radii)
+        # Sommets intérieurs : indices de table j0 .. j0 + n - 1, avec
+        # j0 = floor(start * N / 2pi) + 1 et n = floor(span * N / 2pi) + 1 ;
+        # n ne dépend pas de la rotation. Le dernier peut dépasser la fin de
+        # l'arc d'un pas : il est alors ramené sur l'extrémité.
+        interieurs = np.floor(spans * (1 << bits) / DEUX_PI).astype(np.int64) + 1
+
+        self.batches = []
+        couleurs = {}
+        for position, i in enumerate(indices.tolist()):
+            couleurs.setdefault(tuple(field.colors[i]), []).append(position)
+        for couleur, positions in couleurs.items():
+            positions = np.array(positions)
+            comptes = interieurs[positions] + 2
+            fins = np.cumsum(comptes)
+            debuts = fins - comptes
+            anneau = np.repeat(np.arange(len(positions)), comptes)
+            rang = np.arange(int(fins[-1])) - debuts[anneau] - 1  # -1 : extrémité de départ
+            sommets = int(fins[-1])
+            self.batches.append({
+                "color": couleur,
+                "positions": positions,
+                "starts": debuts,
+                "ends": fins,
+                "ring": anneau,
+                "rank": rang,
+                "bits": bits[positions],
+                "count": interieurs[positions],
+                "shift": TABLE_BITS - bits[positions][anneau],
+                "rho": (radii[positions] - widths[positions] / 2)[anneau],
+                "widths": np.maximum(np.ceil(widths[positions] * EPAISSEUR), 1).astype(int).tolist(),
+                "j": np.empty(sommets, dtype=np.int64),
+                "xy": np.empty((sommets, 2)),
+            })
+        # Distance au-delà de laquelle un segment ne touche plus aucun pixel
+        # autour de son milieu : demi-segment le plus long, demi-épaisseur
+        segment = float(np.max(radii * (DEUX_PI / (1 << bits)), initial=0.0))
+        epaisseur = float(np.max(widths, initial=0)) * EPAISSEUR
+        self.reach = int(math.ceil((segment + epaisseur) / 2)) + 2
+
+    def near(self, surface, rects):
+        # Masque (lignes y, colonnes x) des pixels de surface à moins de
+        # self.reach des rectangles rects
+        largeur, hauteur = surface.get_size()
+        if self.zones is None or self.zones.shape != (hauteur, largeur):
+            self.zones = np.zeros((hauteur, largeur), dtype=bool)
+        zones = self.zones
+        zones.fill(False)
+        for rect in rects:
+            r = rect.inflate(2 * self.reach, 2 * self.reach).clip(surface.get_rect())
+            zones[r.top:r.bottom, r.left:r.right] = True
+        return zones
+
+    def draw(self, surface, field, indices, center, rects=None):
+        # rects : seuls les segments qui peuvent toucher ces zones sont
+        # tracés, entiers (une découpe de surface décalerait les segments
+        # épais recalculés par pygame) ; pygame.draw.lines ne fait que tracer
+        # chaque segment, un sous-ensemble donne donc les mêmes pixels
+        if self.key != (field.layout, indices.tobytes()):
+            self.prepare(field, indices)
+        zones = self.near(surface, rects) if rects is not None else None
+        cx, cy = center
+        starts, ends = field.angles(indices)
+        masque = (1 << TABLE_BITS) - 1
+        for batch in self.batches:
+            positions = batch["positions"]
+            debut = starts[positions]
+            fin = debut + np.mod(ends[positions] - debut, DEUX_PI)
+            j0 = np.floor(debut * (1 << batch["bits"]) / DEUX_PI).astype(np.int64) + 1
+            j, xy, rho = batch["j"], batch["xy"], batch["rho"]
+            np.add(j0[batch["ring"]], batch["rank"], out=j)
+            np.left_shift(j, batch["shift"], out=j)
+            np.bitwise_and(j, masque, out=j)
+            x, y = xy[:, 0], xy[:, 1]
+            np.take(TABLE_COS, j, out=x)
+            np.take(TABLE_SIN, j, out=y)
+            # Extrémités exactes
+            premiers, derniers = batch["starts"], batch["ends"] - 1
+            x[premiers], y[premiers] = np.cos(debut), np.sin(debut)
+            x[derniers], y[derniers] = np.cos(fin), np.sin(fin)
+            depasse = derniers[j0 + batch["count"] - 1 > fin * (1 << batch["bits"]) / DEUX_PI] - 1
+            x[depasse], y[depasse] = x[depasse + 1], y[depasse + 1]
+            x *= rho
+            x += cx
+            y *= -rho
+            y += cy
+            couleur = batch["color"]
+            if zones is not None:
+                self.draw_near(surface, batch, zones)
+                continue
+
+            # Des centaines de milliers de petites listes : le ramassage
+            # automatique se déclencherait sans cesse pendant leur création
+            actif = gc.isenabled()
+            gc.disable()
+            try:
+                sommets = xy.tolist()
+            finally:
+                if actif:
+                    gc.enable()
+            for a, b, width in zip(batch["starts"].tolist(), batch["ends"].tolist(), batch["widths"]):
+                pygame.draw.lines(surface, couleur, False, sommets[a:b], width)
+
+    def draw_near(self, surface, batch, zones):
+        # Segments du lot dont le milieu tombe dans zones, par suites
+        # consécutives d'un même anneau, dans l'ordre du tracé complet
+        xy = batch["xy"]
+        hauteur, largeur = zones.shape
+        milieu = (xy[:-1] + xy[1:]) / 2
+        mx = np.clip(np.rint(milieu[:, 0]), 0, largeur - 1).astype(np.int64)
+        my = np.clip(np.rint(milieu[:, 1]), 0, hauteur - 1).astype(np.int64)
+        choisis = zones[my, mx]
+        choisis[batch["ends"][:-1] - 1] = False  # d'un anneau au suivant
+        if not choisis.any():
+            return
+        bords = np.diff(choisis.astype(np.int8), prepend=0, append=0)
+        debuts, fins = np.flatnonzero(bords == 1), np.flatnonzero(bords == -1)
+        couleur, widths = batch["color"], batch["widths"]
+        for a, b, anneau in zip(debuts.tolist(), fins.tolist(), batch["ring"][debuts].tolist()):
+            pygame.draw.lines(surface, couleur, False, xy[a:b + 1].tolist(), widths[anneau])
+
+    def rotation_rects(self, field, indices, center, turn):
+        # Zones modifiées quand le champ a seulement tourné depuis turn : les
+        # sommets intérieurs sont fixes sur le cercle, seuls changent les
+        # segments proches des extrémités (deux pas de table de part et
+        # d'autre de l'extrémité, avant et après la rotation). None si la
+        # rotation dépasse un pas : autant tout redessiner.
+        delta = field.turn - turn
+        radii = field.radii(indices)
+        widths = field.width[indices]
+        pas = DEUX_PI / (1 << detail_bits(radii))
+        if len(indices) == 0 or abs(delta) > pas.min():
+            return None if len(indices) else []
+        rho = radii - widths / 2
+        marge = np.ceil(np.maximum(np.ceil(widths * EPAISSEUR), 1) / 2).astype(np.int64) + 2
+        cx, cy = center
+        rects = []
+        for bord in field.angles(indices):
+            avant = bord + delta  # angle = phase - turn
+            a0 = np.minimum(bord, avant) - 2 * pas
+            a1 = np.maximum(bord, avant) + 2 * pas
+            angles = np.stack([a0, (a0 + a1) / 2, a1], axis=1)
+            x = cx + np.cos(angles) * rho[:, None]
+            y = cy - np.sin(angles) * rho[:, None]
+            gauche = np.floor(x.min(axis=1)).astype(np.int64) - marge
+            haut = np.floor(y.min(axis=1)).astype(np.int64) - marge
+            droite = np.ceil(x.max(axis=1)).astype(np.int64) + marge
+            bas = np.ceil(y.max(axis=1)).astype(np.int64) + marge
+            # Les bords d'anneaux voisins se suivent : un rectangle qui
+            # recouvre assez le précédent est fusionné avec lui (moins de
+            # zones à effacer et à envoyer, pour la même surface)
+            courant = None
+            for l, t, r, b in zip(gauche.tolist(), haut.tolist(), droite.tolist(), bas.tolist()):
+                if courant is not None:
+                    cl, ct, cr, cb = courant
+                    ul, ut, ur, ub = min(cl, l), min(ct, t), max(cr, r), max(cb, b)
+                    if (ur - ul) * (ub - ut) <= (cr - cl) * (cb - ct) + (r - l) * (b - t):
+                        courant = (ul, ut, ur, ub)
+                        continue
+                    rects.append(pygame.Rect(cl, ct, cr - cl, cb - ct))
+                courant = (l, t, r, b)
+            if courant is not None:
+                cl, ct, cr, cb = courant
+                rects.append(pygame.Rect(cl, ct, cr - cl, cb - ct))
+        return rects
@@ -0,0 +1,147 @@
+import os
+import csv
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from simulation import (Simulation, FPS, PHYSICS_HZ, VEL1, VEL2,
+                        OUVERTURE_DEGREES, ECART_RAYON, DUREE_PARTIE)
+
+CACHE_DIR     = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_balayage")
+CACHE_VERSION = 3  # à incrémenter quand la physique change
+
+# Paramètres balayables et valeurs par défaut (celles de main.py)
+PARAMETRES = {
+    "vel1_x": float(VEL1[0]),
+    "vel1_y": float(VEL1[1]),
+    "vel2_x": float(VEL2[0]),
+    "vel2_y": float(VEL2[1]),
+    "ouverture": float(OUVERTURE_DEGREES),
+    "ecart": float(ECART_RAYON),
+    "duree": float(DUREE_PARTIE),
+}
+COLONNES = list(PARAMETRES) + ["yes_score", "no_score", "winner", "rings_broken"]
+
+
+def cle(params, physics_hz):
+    texte = json.dumps({"v": CACHE_VERSION, "physics_hz": physics_hz, "params": params}, sort_keys=True)
+    return hashlib.sha256(texte.encode("utf-8")).hexdigest()
+
+
+def simulate(params, physics_hz=PHYSICS_HZ):
+    # Une partie complète sans rendu ; le gagnant est celui de l'animation de fin
+    sim = Simulation(physics_hz=physics_hz,
+                     vel1=(params["vel1_x"], params["vel1_y"]),
+                     vel2=(params["vel2_x"], params["vel2_y"]),
+                     ouverture_degrees=params["ouverture"],
+                     ecart_rayon=params["ecart"],
+                     duree=params["duree"])
+    dt = 1.0 / FPS
+    while not sim.finished:
+        sim.advance(dt)
+    yes_score, no_score = sim.scores
+    return {
+        "yes_score": yes_score,
+        "no_score": no_score,
+        "winner": sim.winner_team,
+        "rings_broken": int(sim.arcs.broken.sum()),
+    }
+
+
+def run_cached(params, physics_hz=PHYSICS_HZ, cache_dir=CACHE_DIR):
+    # Exécuté dans un processus du pool ; le résultat est écrit sur disque
+    chemin = os.path.join(cache_dir, cle(params, physics_hz) + ".json")
+    try:
+        with open(chemin) as f:
+            return json.load(f), True
+    except (OSError, ValueError):
+        pass
+
+    resultat = simulate(params, physics_hz)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = chemin + f".{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(resultat, f)
+    os.replace(tmp, chemin)
+    return resultat, False
+
+
+def parse_valeurs(texte):
+    # "nom=a,b,c" pour une grille, "nom=min:max" pour un tirage aléatoire
+    nom, _, valeurs = texte.partition("=")
+    if nom not in PARAMETRES:
+        raise argparse.ArgumentTypeError(f"paramètre inconnu : {nom} (choix : {', '.join(PARAMETRES)})")
+    if ":" in valeurs:
+        bas, haut = valeurs.split(":")
+        return nom, (float(bas), float(haut))
+    return nom, [float(v) for v in valeurs.split(",")]
+
+
+def grid(axes):
+    noms = list(axes)
+    for combinaison in itertools.product(*(axes[n] for n in noms)):
+        params = dict(PARAMETRES)
+        params.update(zip(noms, combinaison))
+        yield params
+
+
+def sample(plages, n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        params = dict(PARAMETRES)
+        for nom, (bas, haut) in plages.items():
+            params[nom] = rng.uniform(bas, haut)
+        yield params
+
+
+def sweep(liste_params, workers=None, physics_hz=PHYSICS_HZ, cache_dir=CACHE_DIR):
+    liste_params = list(liste_params)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        resultats = list(pool.map(run_cached, liste_params,
+                                  itertools.repeat(physics_hz), itertools.repeat(cache_dir),
+                                  chunksize=4))
+    lignes = [dict(params, **resultat) for params, (resultat, _) in zip(liste_params, resultats)]
+    en_cache = sum(1 for _, cache in resultats if cache)
+    return lignes, en_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage parallèle des conditions initiales")
+    parser.add_argument("--grid", action="append", type=parse_valeurs, default=[],
+                        help="grille : nom=v1,v2,... (répétable)")
+    parser.add_argument("--random", type=int, default=0, help="nombre de tirages aléatoires")
+    parser.add_argument("--range", action="append", type=parse_valeurs, default=[],
+                        help="plage des tirages : nom=min:max (répétable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--physics-hz", type=int, default=PHYSICS_HZ)
+    parser.add_argument("--output", help="fichier CSV (défaut : sortie standard)")
+    args = parser.parse_args()
+
+    if args.random:
+        liste_params = sample(dict(args.range), args.random, args.seed)
+    else:
+        liste_params = grid(dict(args.grid))
+
+    debut = time.perf_counter()
+    lignes, en_cache = sweep(liste_params, args.workers, args.physics_hz)
+    duree = time.perf_counter() - debut
+
+    sortie = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.DictWriter(sortie, fieldnames=COLONNES)
+    writer.writeheader()
+    writer.writerows(lignes)
+    if args.output:
+        sortie.close()
+    print(f"{len(lignes)} simulations ({en_cache} en cache) en {duree:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
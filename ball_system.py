@@ -0,0 +1,457 @@
+import math
+import numpy as np
+from pygame.math import Vector2
+from balle import (Balle, GRAVITY, RESTITUTION, MAX_SPEED, BOOST_FACTOR, BOOST_DURATION,
+                   SAME_CENTER_NORMAL)
+
+SQUASH_VERTICAL   = (1.4, 0.6)
+SQUASH_HORIZONTAL = (0.6, 1.4)
+
+
+class BallSystem:
+    # Toutes les balles rangées en tableaux NumPy (structure de tableaux) :
+    # gravité, limitation de vitesse, rebonds sur les bords, boost et
+    # squash/stretch se font en une opération pour toutes les balles, dans le
+    # même ordre que Balle (mêmes arrondis). rows restreint une opération à
+    # certaines balles.
+    def __init__(self, positions, velocities, radii, colors, teams=None):
+        self.pos      = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        n = len(self.pos)
+        self.vel      = np.array(velocities, dtype=np.float64).reshape(n, 2)
+        self.prev_pos = self.pos.copy()  # positions au pas physique précédent
+        self.radius   = np.array(radii, dtype=np.float64).reshape(n)
+        self.mass     = self.radius.copy()
+        self.restitution = np.full(n, RESTITUTION, dtype=np.float64)
+        self.colors   = list(colors)
+        self.teams    = list(teams) if teams is not None else [None] * n
+        self.score    = np.zeros(n, dtype=np.int64)
+
+        self.boosting    = np.zeros(n, dtype=bool)
+        self.can_boost   = np.ones(n, dtype=bool)
+        self.boost_timer = np.zeros(n, dtype=np.float64)
+
+        # Squash and stretch
+        self.scale          = np.ones((n, 2), dtype=np.float64)
+        self.target_scale   = np.ones((n, 2), dtype=np.float64)
+        self.scale_timer    = np.zeros(n, dtype=np.float64)
+        self.scale_duration = np.full(n, 0.2, dtype=np.float64)
+
+        self.views = [BallView(self, i) for i in range(n)]
+
+        # Tampons des opérations sur toutes les balles (Simulation.step) :
+        # pas d'allocation par pas. start_pos : positions au début du pas.
+        self.start_pos = np.empty((n, 2), dtype=np.float64)
+        self.step_vec  = np.empty((n, 2), dtype=np.float64)
+        self.tmp       = tuple(np.empty(n, dtype=np.float64) for _ in range(4))
+        self.masks     = tuple(np.empty(n, dtype=bool) for _ in range(5))
+        self.hit       = np.empty(n, dtype=bool)
+        self.columns   = BallColumns(self)
+
+    def __getstate__(self):
+        # Les vues de columns deviendraient des copies au dépickling : elles
+        # sont recréées sur les tableaux restaurés
+        etat = self.__dict__.copy()
+        del etat["columns"]
+        return etat
+
+    def __setstate__(self, etat):
+        self.__dict__.update(etat)
+        self.columns = BallColumns(self)
+
+    @classmethod
+    def from_balles(cls, balles):
+        # Reprend l'état complet de Balle existantes (ou de vues)
+        systeme = cls([tuple(b.pos) for b in balles], [tuple(b.vel) for b in balles],
+                      [b.radius for b in balles], [b.color for b in balles],
+                      [b.team for b in balles])
+        for vue, b in zip(systeme.views, balles):
+            vue.prev_pos       = b.prev_pos
+            vue.mass           = b.mass
+            vue.restitution    = b.restitution
+            vue.score          = b.score
+            vue.is_boosting    = b.is_boosting
+            vue.can_boost      = b.can_boost
+            vue.boost_timer    = b.boost_timer
+            vue.scale          = b.scale
+            vue.target_scale   = b.target_scale
+            vue.scale_timer    = b.scale_timer
+            vue.scale_duration = b.scale_duration
+        return systeme
+
+    def __len__(self):
+        return len(self.views)
+
+    def __getitem__(self, i):
+        return self.views[i]
+
+    def __iter__(self):
+        return iter(self.views)
+
+    def store_previous(self):
+        np.copyto(self.prev_pos, self.pos)
+
+    def select(self, rows):
+        # Colonnes des balles rows (tranche), toutes par défaut
+        return self.columns if rows is None else BallColumns(self, rows)
+
+    # Opérations écrites une fois sur les colonnes, colonne par colonne dans
+    # les tampons : mêmes arrondis que Balle, sans allocation (ni réductions
+    # any(), ni ufuncs avec where= ou diffusion, qui allouent leurs
+    # itérateurs). rows restreint une opération à une tranche de balles.
+
+    def clamp_velocity(self, rows=None, where=None):
+        # where : masque des balles concernées parmi rows (défaut : toutes)
+        c = self.select(rows)
+        vx, vy = c.vel
+        speed, facteur = c.tmp[0], c.tmp[1]
+        trop = c.masks[0]
+        np.multiply(vx, vx, out=speed)
+        np.multiply(vy, vy, out=facteur)
+        speed += facteur
+        np.sqrt(speed, out=speed)
+        np.greater(speed, MAX_SPEED, out=trop)
+        if where is not None:
+            trop &= where
+        if np.count_nonzero(trop):
+            # Facteur MAX_SPEED / speed sur les lignes trop rapides, 1.0 ailleurs
+            facteur.fill(MAX_SPEED)
+            np.copyto(facteur, speed, where=trop)
+            np.divide(MAX_SPEED, facteur, out=facteur)
+            vx *= facteur
+            vy *= facteur
+
+    def update(self, dt, rows=None):
+        c = self.select(rows)
+        vx, vy = c.vel
+        vy += GRAVITY * dt
+        self.clamp_velocity(rows)
+
+        dx, dy = c.step
+        if np.count_nonzero(c.boosting):
+            facteur = c.tmp[0]
+            facteur.fill(1.0)
+            np.copyto(facteur, BOOST_FACTOR, where=c.boosting)
+            np.multiply(vx, facteur, out=dx)
+            np.multiply(vy, facteur, out=dy)
+            dx *= dt
+            dy *= dt
+        else:
+            np.multiply(vx, dt, out=dx)  # facteur 1.0 : même arrondi
+            np.multiply(vy, dt, out=dy)
+        px, py = c.pos
+        px += dx
+        py += dy
+
+        attente, fin = c.masks[0], c.masks[1]
+        np.logical_not(c.can_boost, out=attente)
+        if np.count_nonzero(attente):
+            timer, t = c.boost_timer, c.tmp[0]
+            np.subtract(timer, dt, out=t)
+            np.copyto(timer, t, where=attente)
+            np.less_equal(timer, 0.0, out=fin)
+            fin &= attente
+            if np.count_nonzero(fin):
+                np.copyto(timer, 0.0, where=fin)
+                np.copyto(c.boosting, False, where=fin)
+                np.copyto(c.can_boost, True, where=fin)
+
+        # Animation squash/stretch
+        timer = c.scale_timer
+        actif = c.masks[0]
+        np.greater(timer, 0.0, out=actif)
+        if not np.count_nonzero(actif):
+            for colonne in c.scale:
+                colonne.fill(1.0)
+            return
+        t, scale = c.tmp[0], c.tmp[1]
+        np.subtract(timer, dt, out=t)
+        np.copyto(timer, t, where=actif)
+        np.divide(timer, c.scale_duration, out=t)
+        np.subtract(1.0, t, out=t)
+        np.maximum(0.0, t, out=t)
+        np.subtract(1.0, t, out=t)
+        for colonne, cible in zip(c.scale, c.target):
+            np.subtract(cible, 1.0, out=scale)
+            scale *= t
+            scale += 1.0
+            colonne.fill(1.0)
+            np.copyto(colonne, scale, where=actif)
+
+    def check_bounce_edges(self, width, height, rows=None):
+        c = self.select(rows)
+        px, py = c.pos
+        r = c.radius
+        gauche, droite, haut, bas, exclu = c.masks
+        borne = c.tmp[0]
+        np.subtract(px, r, out=borne)
+        np.less(borne, 0.0, out=gauche)
+        np.add(px, r, out=borne)
+        np.greater(borne, width, out=droite)
+        np.subtract(py, r, out=borne)
+        np.less(borne, 0.0, out=haut)
+        np.add(py, r, out=borne)
+        np.greater(borne, height, out=bas)
+        rebond = c.hit
+        np.logical_or(gauche, droite, out=rebond)
+        rebond |= haut
+        rebond |= bas
+        if not np.count_nonzero(rebond):
+            return
+
+        vx, vy = c.vel
+        np.logical_not(gauche, out=exclu)
+        droite &= exclu
+        np.logical_not(haut, out=exclu)
+        bas &= exclu
+        oppose, v = c.tmp[1], c.tmp[2]
+        np.negative(c.restitution, out=oppose)
+        np.copyto(px, r, where=gauche)
+        np.subtract(width, r, out=borne)
+        np.copyto(px, borne, where=droite)
+        droite |= gauche
+        np.multiply(vx, oppose, out=v)
+        np.copyto(vx, v, where=droite)
+        np.copyto(py, r, where=haut)
+        np.subtract(height, r, out=borne)
+        np.copyto(py, borne, where=bas)
+        bas |= haut
+        np.multiply(vy, oppose, out=v)
+        np.copyto(vy, v, where=bas)
+
+        self.clamp_velocity(rows, rebond)
+        np.copyto(c.scale_timer, c.scale_duration, where=rebond)
+        vertical, horizontal = c.masks[1], c.masks[2]
+        np.abs(vy, out=borne)
+        np.abs(vx, out=v)
+        np.greater(borne, v, out=vertical)
+        np.logical_not(vertical, out=horizontal)
+        vertical &= rebond
+        horizontal &= rebond
+        for colonne, (sv, sh) in zip(c.target, zip(SQUASH_VERTICAL, SQUASH_HORIZONTAL)):
+            np.copyto(colonne, sv, where=vertical)
+            np.copyto(colonne, sh, where=horizontal)
+
+    def collide_pairs(self, paires):
+        # Résout les paires candidates dans l'ordre. Au-delà de quelques paires,
+        # celles qui ne se chevauchent pas au début de la passe sont écartées
+        # en une opération (comme la phase large, qui part aussi des positions
+        # du début de la passe)
+        if len(paires) > 8:
+            i, j = np.array(paires, dtype=np.int64).T
+            d = self.pos[i] - self.pos[j]
+            r = self.radius[i] + self.radius[j]
+            proches = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] < r * r
+            paires = zip(i[proches].tolist(), j[proches].tolist())
+        for i, j in paires:
+            self.collide(i, j)
+
+    def collide(self, i, j):
+        # Balle.check_circle_collision entre les balles i et j, sur des flottants
+        # Python (mêmes opérations que Vector2) plutôt qu'à travers les vues
+        pos, vel = self.pos, self.vel
+        p1x, p1y = pos[i].tolist()
+        p2x, p2y = pos[j].tolist()
+        ox = p1x - p2x
+        oy = p1y - p2y
+        dist_sq = ox * ox + oy * oy
+        rayon_min = float(self.radius[i] + self.radius[j])
+        if dist_sq >= rayon_min ** 2:
+            return
+
+        longueur = math.sqrt(dist_sq)
+        overlap = rayon_min - max(longueur, 1e-8)
+        if longueur > 0:
+            nx = ox / longueur
+            ny = oy / longueur
+        else:
+            nx, ny = SAME_CENTER_NORMAL
+        cx = nx * (overlap / 2)
+        cy = ny * (overlap / 2)
+        pos[i] = (p1x + cx, p1y + cy)
+        pos[j] = (p2x - cx, p2y - cy)
+
+        v1x, v1y = vel[i].tolist()
+        v2x, v2y = vel[j].tolist()
+        vel_norm = (v1x - v2x) * nx + (v1y - v2y) * ny
+        if vel_norm >= 0:
+            return
+
+        m1 = float(self.mass[i])
+        m2 = float(self.mass[j])
+        impulse = (2 * vel_norm) / (m1 + m2)
+        k1 = impulse * m2
+        k2 = impulse * m1
+        vel[i] = clamp(v1x - k1 * nx, v1y - k1 * ny)
+        vel[j] = clamp(v2x + k2 * nx, v2y + k2 * ny)
+
+        for k in (i, j):
+            if self.can_boost[k]:
+                self.boosting[k]    = True
+                self.can_boost[k]   = False
+                self.boost_timer[k] = BOOST_DURATION
+
+            # Squash/stretch sur collision entre balles
+            self.scale_timer[k]  = self.scale_duration[k]
+            self.target_scale[k] = SQUASH_VERTICAL
+
+
+def clamp(x, y):
+    # Balle.clamp_velocity sur un couple de flottants (Vector2.scale_to_length)
+    speed = math.sqrt(x * x + y * y)
+    if speed > MAX_SPEED:
+        fraction = MAX_SPEED / speed
+        return x * fraction, y * fraction
+    return x, y
+
+
+class BallColumns:
+    # Vues sur les colonnes des tableaux d'un BallSystem et sur ses tampons,
+    # pour les balles rows (tranche) : (x, y) pour les vecteurs. Ce ne sont
+    # que des vues, jamais picklées (BallSystem.__getstate__).
+    __slots__ = ("pos", "vel", "start", "step", "scale", "target", "radius", "restitution",
+                 "boosting", "can_boost", "boost_timer", "scale_timer", "scale_duration",
+                 "tmp", "masks", "hit")
+
+    def __init__(self, systeme, rows=slice(None)):
+        def xy(a):
+            return a[rows, 0], a[rows, 1]
+        self.pos, self.vel = xy(systeme.pos), xy(systeme.vel)
+        self.start, self.step = xy(systeme.start_pos), xy(systeme.step_vec)
+        self.scale, self.target = xy(systeme.scale), xy(systeme.target_scale)
+        for nom in ("radius", "restitution", "boosting", "can_boost", "boost_timer",
+                    "scale_timer", "scale_duration", "hit"):
+            setattr(self, nom, getattr(systeme, nom)[rows])
+        self.tmp   = tuple(t[rows] for t in systeme.tmp)
+        self.masks = tuple(m[rows] for m in systeme.masks)
+
+
+class BoundVector(Vector2):
+    # Vector2 relié à une ligne d'un tableau du système : toute modification
+    # en place (v.x = ..., v += ..., v.scale_to_length(...)) y est recopiée.
+    # Les résultats d'opérations (v * 2, v.copy()...) ne sont reliés à rien.
+    __slots__ = ("ligne",)
+
+    def __setattr__(self, name, value):
+        Vector2.__setattr__(self, name, value)
+        if name != "ligne":
+            self.sync()
+
+    def sync(self):
+        ligne = getattr(self, "ligne", None)
+        if ligne is not None:
+            ligne[0], ligne[1] = self[0], self[1]
+
+    def _en_place(name):
+        methode = getattr(Vector2, name)
+
+        def modifier(self, *args, **kwargs):
+            resultat = methode(self, *args, **kwargs)
+            self.sync()
+            return resultat
+        modifier.__name__ = name
+        return modifier
+
+    __setitem__        = _en_place("__setitem__")
+    __iadd__           = _en_place("__iadd__")
+    __isub__           = _en_place("__isub__")
+    __imul__           = _en_place("__imul__")
+    __itruediv__       = _en_place("__itruediv__")
+    __ifloordiv__      = _en_place("__ifloordiv__")
+    update             = _en_place("update")
+    scale_to_length    = _en_place("scale_to_length")
+    normalize_ip       = _en_place("normalize_ip")
+    rotate_ip          = _en_place("rotate_ip")
+    rotate_rad_ip      = _en_place("rotate_rad_ip")
+    reflect_ip         = _en_place("reflect_ip")
+    clamp_magnitude_ip = _en_place("clamp_magnitude_ip")
+    move_towards_ip    = _en_place("move_towards_ip")
+    from_polar         = _en_place("from_polar")
+    del _en_place
+
+
+class BallView(Balle):
+    # Vue sur une balle du système : même interface qu'une Balle, mais les
+    # valeurs sont lues et écrites directement dans les tableaux du système.
+    # pos, vel, scale... renvoient un BoundVector : balle.pos = ...,
+    # balle.pos += ... et balle.vel.x = ... écrivent tous dans le système.
+    __slots__ = ("system", "index")
+
+    def __init__(self, system, index):
+        self.system = system
+        self.index  = index
+
+    def __reduce__(self):
+        # Les propriétés masquent les slots de Balle : on ne pickle que le lien
+        return BallView, (self.system, self.index)
+
+    def _vector(name):
+        def lire(self):
+            ligne = getattr(self.system, name)[self.index]
+            vecteur = BoundVector(*ligne.tolist())
+            vecteur.ligne = ligne
+            return vecteur
+
+        def ecrire(self, value):
+            getattr(self.system, name)[self.index] = (value[0], value[1])
+        return property(lire, ecrire)
+
+    def _scalar(name, type_=float):
+        def lire(self):
+            return type_(getattr(self.system, name)[self.index])
+
+        def ecrire(self, value):
+            getattr(self.system, name)[self.index] = value
+        return property(lire, ecrire)
+
+    pos            = _vector("pos")
+    vel            = _vector("vel")
+    prev_pos       = _vector("prev_pos")
+    scale          = _vector("scale")
+    target_scale   = _vector("target_scale")
+    radius         = _scalar("radius")
+    mass           = _scalar("mass")
+    restitution    = _scalar("restitution")
+    score          = _scalar("score", int)
+    is_boosting    = _scalar("boosting", bool)
+    can_boost      = _scalar("can_boost", bool)
+    boost_timer    = _scalar("boost_timer")
+    scale_timer    = _scalar("scale_timer")
+    scale_duration = _scalar("scale_duration")
+    del _vector, _scalar
+
+    @property
+    def color(self):
+        return self.system.colors[self.index]
+
+    @color.setter
+    def color(self, value):
+        self.system.colors[self.index] = value
+
+    @property
+    def team(self):
+        return self.system.teams[self.index]
+
+    @team.setter
+    def team(self, value):
+        self.system.teams[self.index] = value
+
+    def rows(self):
+        return slice(self.index, self.index + 1)
+
+    def clamp_velocity(self):
+        self.system.clamp_velocity(self.rows())
+
+    def store_previous(self):
+        self.system.prev_pos[self.index] = self.system.pos[self.index]
+
+    def update(self, dt):
+        self.system.update(dt, self.rows())
+
+    def check_bounce_edges(self, width, height):
+        self.system.check_bounce_edges(width, height, self.rows())
+
+    def check_circle_collision(self, autre):
+        if isinstance(autre, BallView) and autre.system is self.system:
+            self.system.collide(self.index, autre.index)
+        else:
+            super().check_circle_collision(autre)
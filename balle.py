@@ -1,3 +1,4 @@
+import math
 import pygame
 from pygame.math import Vector2
 
@@ -13,13 +14,27 @@ RESTITUTION    = 1.0
 MAX_SPEED      = 800
 BOOST_FACTOR   = 1.5
 BOOST_DURATION = 0.2
+# Normale de contact de deux balles aux centres confondus (la direction est
+# indéfinie) : la première part vers le haut, l'autre vers le bas
+SAME_CENTER_NORMAL = (0.0, -1.0)
 
 class Balle:
-    def __init__(self, x, y, radius, color):
+    # __slots__ : pas de dictionnaire par balle, accès aux attributs plus
+    # rapides. Les vecteurs (pos, vel, scale...) sont modifiés en place dans
+    # les chemins appelés à chaque pas : aucun objet créé tant qu'il n'y a
+    # ni rebond ni collision.
+    __slots__ = ("pos", "vel", "prev_pos", "radius", "color", "team", "score", "mass",
+                 "restitution", "is_boosting", "boost_timer", "can_boost", "scale",
+                 "target_scale", "scale_timer", "scale_duration")
+
+    def __init__(self, x, y, radius, color, team=None):
         self.pos    = Vector2(x, y)
         self.vel    = Vector2(0, 0)
+        self.prev_pos = Vector2(x, y)  # position au pas physique précédent
         self.radius = radius
         self.color  = color
+        self.team   = team  # "YES" / "NO" : équipe créditée des anneaux cassés
+        self.score  = 0     # anneaux cassés par cette balle
 
         self.mass        = radius
         self.restitution = RESTITUTION
@@ -35,32 +50,57 @@ class Balle:
         self.scale_duration = 0.2
 
     def clamp_velocity(self):
-        speed = self.vel.length()
+        # Norme sur les composantes (même valeur que vel.length(), sans créer
+        # de méthode liée)
+        vel = self.vel
+        speed = math.sqrt(vel.x * vel.x + vel.y * vel.y)
         if speed > MAX_SPEED:
             self.vel.scale_to_length(MAX_SPEED)
 
-    def draw(self, surface):
+    def store_previous(self):
+        prev, pos = self.prev_pos, self.pos
+        prev.x = pos.x
+        prev.y = pos.y
+
+    def render_pos(self, alpha=1.0):
+        # Position interpolée entre les deux derniers pas physiques
+        return self.prev_pos.lerp(self.pos, alpha)
+
+    def bounds(self, alpha=1.0):
+        # Rectangle couvert par draw() (halo compris)
+        scaled_radius_x = int(self.radius * self.scale.x) + 4
+        scaled_radius_y = int(self.radius * self.scale.y) + 4
+        pos = self.render_pos(alpha)
+        return pygame.Rect(int(pos.x) - scaled_radius_x - 1, int(pos.y) - scaled_radius_y - 1,
+                           scaled_radius_x * 2 + 3, scaled_radius_y * 2 + 3)
+
+    def draw(self, surface, alpha=1.0):
         scaled_radius_x = int(self.radius * self.scale.x)
         scaled_radius_y = int(self.radius * self.scale.y)
+        pos = self.render_pos(alpha)
 
         # Fond blanc (halo)
         pygame.draw.ellipse(surface, (255, 255, 255),
             pygame.Rect(0, 0, scaled_radius_x * 2 + 8, scaled_radius_y * 2 + 8).move(
-                self.pos.x - scaled_radius_x - 4, self.pos.y - scaled_radius_y - 4)
+                pos.x - scaled_radius_x - 4, pos.y - scaled_radius_y - 4)
         )
 
         # Balle colorée
         pygame.draw.ellipse(surface, self.color,
             pygame.Rect(0, 0, scaled_radius_x * 2, scaled_radius_y * 2).move(
-                self.pos.x - scaled_radius_x, self.pos.y - scaled_radius_y)
+                pos.x - scaled_radius_x, pos.y - scaled_radius_y)
         )
 
     def update(self, dt):
         self.vel.y += GRAVITY * dt
         self.clamp_velocity()
 
+        # Composante par composante : mêmes arrondis que pos += vel * facteur * dt
         facteur = BOOST_FACTOR if self.is_boosting else 1.0
-        self.pos += self.vel * facteur * dt
+        vel = self.vel
+        pos = self.pos
+        pos.x += vel.x * facteur * dt
+        pos.y += vel.y * facteur * dt
 
         if not self.can_boost:
             self.boost_timer -= dt
@@ -72,13 +112,14 @@ class Balle:
         # Animation squash/stretch
         if self.scale_timer > 0:
             self.scale_timer -= dt
-            t = max(0.0, 1.0 - (self.scale_timer / self.scale_duration))
-            self.scale = Vector2(
-                1 + (self.target_scale.x - 1) * (1 - t),
-                1 + (self.target_scale.y - 1) * (1 - t)
-            )
+            t = 1.0 - (self.scale_timer / self.scale_duration)
+            if t < 0.0:  # max(0.0, t) sans le tuple d'arguments
+                t = 0.0
+            self.scale.x = 1 + (self.target_scale.x - 1) * (1 - t)
+            self.scale.y = 1 + (self.target_scale.y - 1) * (1 - t)
         else:
-            self.scale = Vector2(1, 1)
+            self.scale.x = 1
+            self.scale.y = 1
 
     def check_bounce_edges(self, width, height):
         rebondi = False
@@ -105,19 +146,22 @@ class Balle:
             self.clamp_velocity()
             self.scale_timer  = self.scale_duration
             if abs(self.vel.y) > abs(self.vel.x):  # Rebond vertical
-                self.target_scale = Vector2(1.4, 0.6)
+                self.target_scale.update(1.4, 0.6)
             else:  # Rebond horizontal
-                self.target_scale = Vector2(0.6, 1.4)
+                self.target_scale.update(0.6, 1.4)
 
     def check_circle_collision(self, autre):
-        offset  = self.pos - autre.pos
-        dist_sq = offset.length_squared()
+        # Test de distance sur des flottants : le vecteur offset n'est construit
+        # qu'en cas de contact
+        dx = self.pos.x - autre.pos.x
+        dy = self.pos.y - autre.pos.y
         rayon_min = self.radius + autre.radius
 
-        if dist_sq < rayon_min ** 2:
+        if dx * dx + dy * dy < rayon_min ** 2:
+            offset   = self.pos - autre.pos
             dist     = max(offset.length(), 1e-8)
             overlap  = rayon_min - dist
-            normal   = offset.normalize()
+            normal   = offset.normalize() if offset else Vector2(SAME_CENTER_NORMAL)
 
             correction = normal * (overlap / 2)
             self.pos  += correction
@@ -145,11 +189,9 @@ class Balle:
                     autre.boost_timer  = BOOST_DURATION
 
                 # Squash/stretch sur collision entre balles
+                # (par affectation : autre peut être une vue de BallSystem)
                 self.scale_timer  = self.scale_duration
                 self.target_scale = Vector2(1.4, 0.6)
 
                 autre.scale_timer  = autre.scale_duration
                 autre.target_scale = Vector2(1.4, 0.6)
-
-    def check_wall_cercle_collision(self, cercle):
-        return cercle.check_wall_cercle_collision(self)
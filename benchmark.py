@@ -0,0 +1,511 @@
+import os
+import math
+import csv
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tracemalloc
+from functools import partial
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from pygame.math import Vector2
+from balle import Balle
+from ball_system import BallSystem
+from arc_circle import ArcCircle, RAYON_DEPART
+from arc_field import ArcField, RAYON_VISIBLE
+from ring_index import RingIndex
+from spatial_hash import SpatialHash
+from rendu import Rendu
+from simulation import (Simulation, WIDTH, HEIGHT, FPS, PHYSICS_HZ, BALL_RADIUS, ECART_RAYON,
+                        OUVERTURE_DEGREES, BLUE, RED, WHITE, GREEN)
+
+RINGS       = [100, 1000, 10000, 100000]
+BALLS       = [2, 32, 256]
+RESOLUTIONS = [720, 1080, 2160]
+COLONNES    = ["name", "rings", "balls", "resolution", "iterations", "median_us", "min_us", "max_us"]
+
+# Budgets d'allocation (octets) : pic temporaire d'une image, et d'un appel
+# du chemin chaud en régime établi. Un opérande scalaire Python devient un
+# tableau 0-d temporaire dans NumPy (~100 à 200 o) : le budget par appel en
+# tolère quelques-uns.
+ALLOC_BUDGET = 1024
+CALL_BUDGET  = 512
+
+
+# ---------- scènes ----------
+def ring_layout(n, resolution=None):
+    # Rayons, angles de départ et de fin comme dans Simulation. Sans résolution :
+    # disposition du jeu (ECART_RAYON, la plupart hors écran). Avec résolution :
+    # les n anneaux sont resserrés dans la zone visible, pour que le dessin
+    # dépende vraiment de leur nombre.
+    indices = np.arange(n)
+    if resolution is None:
+        radii = RAYON_DEPART + indices * ECART_RAYON
+    else:
+        rayon_max = min(resolution / 2, RAYON_VISIBLE)
+        radii = RAYON_DEPART + indices * ((rayon_max - RAYON_DEPART) / n)
+    start_deg = indices * -5
+    colors = [[BLUE, RED, WHITE][i % 3] for i in range(n)]
+    return radii, np.radians(start_deg), np.radians(start_deg + OUVERTURE_DEGREES), colors
+
+
+def make_field(n, center=(WIDTH // 2, HEIGHT // 2), resolution=None):
+    return ArcField(center, *ring_layout(n, resolution))
+
+
+def make_arcs(n, center=(WIDTH // 2, HEIGHT // 2), resolution=None):
+    radii, starts, ends, colors = ring_layout(n, resolution)
+    return [ArcCircle(center, float(r), float(s), float(e), c)
+            for r, s, e, c in zip(radii.tolist(), starts.tolist(), ends.tolist(), colors)]
+
+
+def make_balls(n, seed=0):
+    # Balles tirées dans le premier anneau, vitesses du même ordre que VEL1 / VEL2
+    rng = random.Random(seed)
+    balles = []
+    for i in range(n):
+        angle = rng.uniform(0, 2 * np.pi)
+        distance = rng.uniform(0, RAYON_DEPART - BALL_RADIUS)
+        b = Balle(WIDTH // 2 + distance * np.cos(angle), HEIGHT // 2 + distance * np.sin(angle),
+                  BALL_RADIUS, GREEN if i % 2 else RED, "YES" if i % 2 else "NO")
+        b.vel = Vector2(rng.uniform(-400, 400), rng.uniform(-400, 400))
+        balles.append(b)
+    return balles
+
+
+# ---------- cas mesurés ----------
+# Chaque cas renvoie (preparer, action) : preparer() construit un état neuf
+# (non chronométré), action(etat) fait une itération.
+def case_physics(rings, balls):
+    # Pas de jeu (Simulation.step_play) généralisé à n balles : update, bords,
+    # collision continue avec les anneaux, paires de balles (phase large par
+    # grille), rotation/rétrécissement
+    dt = 1.0 / PHYSICS_HZ
+
+    def preparer():
+        field = make_field(rings)
+        return field, RingIndex(field), BallSystem.from_balles(make_balls(balls)), SpatialHash()
+
+    def action(etat):
+        field, index, systeme, grille = etat
+        departs = systeme.start_pos
+        np.copyto(departs, systeme.pos)
+        systeme.update(dt)
+        systeme.check_bounce_edges(WIDTH, HEIGHT)
+        for i in np.flatnonzero(index.may_hit(systeme)).tolist():
+            index.sweep(systeme[i], Vector2(departs[i, 0], departs[i, 1]), dt)
+        index.events.clear()  # contacts du pas, sans consommateur ici
+        systeme.collide_pairs(grille.pairs(systeme))
+        field.rotate(dt)
+        if not index.has_ring_within(RAYON_DEPART):
+            field.shrink(dt)
+
+    return preparer, action
+
+
+def legacy_wall_collision(arc, balle):
+    # Ancienne collision balle / anneau, gardée comme référence de mesure :
+    # test discret de la position (pas de temps de contact), note jouée sur
+    # place et casse renvoyée sans être comptée. Le jeu passe par
+    # RingIndex.sweep et le CollisionBus.
+    if arc.broken:
+        return False
+
+    pos = balle.pos
+    center = arc.center
+    dx = pos.x - center.x
+    dy = pos.y - center.y
+    distance = math.sqrt(dx * dx + dy * dy)
+
+    if distance + balle.radius > arc.radius:
+        if arc.is_in_hole(pos):
+            arc.broken = True
+            return True
+        normal = (pos - center).normalize()
+        balle.vel = balle.vel.reflect(normal) * balle.restitution
+        overlap = (distance + balle.radius) - arc.radius
+        balle.pos -= normal * overlap
+        if arc.midi_manager:
+            arc.midi_manager.play_next_note()
+
+    return False
+
+
+def case_collision_naive(rings, balls):
+    # Balle.update + legacy_wall_collision sur tous les anneaux
+    dt = 1.0 / PHYSICS_HZ
+
+    def preparer():
+        return make_arcs(rings), make_balls(balls)
+
+    def action(etat):
+        arcs, balles = etat
+        for b in balles:
+            b.update(dt)
+            b.check_bounce_edges(WIDTH, HEIGHT)
+            for arc in arcs:
+                legacy_wall_collision(arc, b)
+
+    return preparer, action
+
+
+def case_rotate_shrink(rings):
+    dt = 1.0 / PHYSICS_HZ
+
+    def action(field):
+        field.rotate(dt)
+        field.shrink(dt)
+
+    return (lambda: make_field(rings)), action
+
+
+def case_rotate_shrink_objects(rings):
+    dt = 1.0 / PHYSICS_HZ
+
+    def action(arcs):
+        for arc in arcs:
+            arc.rotate(dt)
+            arc.shrink(dt)
+
+    return (lambda: make_arcs(rings)), action
+
+
+def case_draw_arcs(rings, resolution):
+    def preparer():
+        centre = (resolution // 2, resolution // 2)
+        return pygame.Surface((resolution, resolution)), make_field(rings, centre, resolution)
+
+    def action(etat):
+        surface, field = etat
+        field.draw(surface)
+
+    return preparer, action
+
+
+def case_draw_arcs_objects(rings, resolution):
+    def preparer():
+        centre = (resolution // 2, resolution // 2)
+        return pygame.Surface((resolution, resolution)), make_arcs(rings, centre, resolution)
+
+    def action(etat):
+        surface, arcs = etat
+        for arc in arcs:
+            arc.draw(surface)
+
+    return preparer, action
+
+
+def case_hud(resolution):
+    # Textes du HUD et étiquettes des balles ; le chrono avance d'une image à
+    # chaque itération, comme à l'écran
+    def preparer():
+        return pygame.Surface((resolution, resolution)), Rendu(), Simulation()
+
+    def action(etat):
+        surface, rendu, sim = etat
+        sim.timer = max(sim.timer - 1.0 / FPS, 0.0)
+        rendu.draw_balls(surface, sim)
+        rendu.draw_hud(surface, sim)
+
+    return preparer, action
+
+
+def cases(rings_list, balls_list, resolutions):
+    # (nom, paramètres, fabrique sans argument) de toutes les mesures demandées
+    for rings in rings_list:
+        for balls in balls_list:
+            yield "physics", {"rings": rings, "balls": balls}, partial(case_physics, rings, balls)
+        yield "collision_naive", {"rings": rings, "balls": 2}, partial(case_collision_naive, rings, 2)
+        yield "rotate_shrink", {"rings": rings}, partial(case_rotate_shrink, rings)
+        yield "rotate_shrink_objects", {"rings": rings}, partial(case_rotate_shrink_objects, rings)
+        for resolution in resolutions:
+            params = {"rings": rings, "resolution": resolution}
+            yield "draw_arcs", params, partial(case_draw_arcs, rings, resolution)
+            yield "draw_arcs_objects", params, partial(case_draw_arcs_objects, rings, resolution)
+    for resolution in resolutions:
+        yield "hud", {"resolution": resolution}, partial(case_hud, resolution)
+
+
+# ---------- mesure ----------
+def measure(preparer, action, repeats=3, budget=0.2):
+    # Temps par itération (s) de chaque répétition : autant d'itérations que
+    # le budget le permet, au moins une
+    temps = []
+    iterations = 0
+    for _ in range(repeats):
+        etat = preparer()
+        n = 0
+        debut = time.perf_counter()
+        while True:
+            action(etat)
+            n += 1
+            ecoule = time.perf_counter() - debut
+            if ecoule >= budget:
+                break
+        temps.append(ecoule / n)
+        iterations += n
+    return temps, iterations
+
+
+def peak_bytes(appel, n):
+    # Pics tracemalloc (octets) au-dessus de la mémoire tracée avant chaque
+    # appel, sur n appels (après un premier appel non compté, qui remplit la
+    # liste libre des flottants)
+    appel()
+    pics = [0] * n
+    for i in range(n):
+        avant = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        appel()
+        pics[i] = tracemalloc.get_traced_memory()[1] - avant
+    return pics
+
+
+def scene(rings, balls):
+    # Simulation (phase de jeu) dont le champ et les balles sont ceux des
+    # mesures : rings anneaux, balls balles
+    sim = Simulation()
+    sim.arcs = make_field(rings)
+    sim.ring_index = RingIndex(sim.arcs, sim.collisions.buffer)
+    sim.ball_system = BallSystem.from_balles(make_balls(balls))
+    sim.balles = sim.ball_system.views
+    return sim
+
+
+def hot_calls(rings, balls):
+    # Etapes de Simulation.step appelées seules, en régime établi : balles
+    # immobiles dans le premier anneau, loin des bords et de l'anneau,
+    # squash/stretch en cours
+    dt = 1.0 / PHYSICS_HZ
+    sim = scene(rings, balls)
+    systeme = sim.ball_system
+    angles = np.arange(len(systeme)) * (2 * np.pi / len(systeme))
+    systeme.pos[:, 0] = WIDTH // 2 + RAYON_DEPART / 2 * np.cos(angles)
+    systeme.pos[:, 1] = HEIGHT // 2 + RAYON_DEPART / 2 * np.sin(angles)
+    systeme.vel.fill(0.0)
+    systeme.scale_timer.fill(1e9)
+    depart = systeme.pos.copy()
+    paires = sim.broad_phase.pairs(systeme)
+
+    def update():
+        systeme.update(dt)
+        # Pas de vitesse accumulée : les balles restent en place
+        systeme.vel.fill(0.0)
+        np.copyto(systeme.pos, depart)
+
+    return {
+        "BallSystem.store_previous": systeme.store_previous,
+        "BallSystem.update": update,
+        "BallSystem.check_bounce_edges": partial(systeme.check_bounce_edges, WIDTH, HEIGHT),
+        "RingIndex.may_hit": partial(sim.ring_index.may_hit, systeme),
+        "SpatialHash.pairs": partial(sim.broad_phase.pairs, systeme),
+        "BallSystem.collide_pairs": partial(systeme.collide_pairs, paires),
+        "ArcField.rotate": partial(sim.arcs.rotate, dt),
+        "CollisionBus.dispatch": partial(sim.collisions.dispatch, sim),
+    }
+
+
+def allocations(rings, balls, frames=600, warmup=60, calls=1000):
+    # Allocations de Simulation.step (BallSystem, RingIndex.sweep, bus des
+    # contacts) mesurées avec tracemalloc : pic médian par appel de chaque
+    # étape en régime établi, puis en jeu le pic des objets temporaires au
+    # cours d'une image (Simulation.advance), la croissance nette sur toute
+    # la prise et les ramassages du GC (génération 0) déclenchés
+    # Préchauffage sur une scène identique (déterministe), le temps de toute
+    # la prise : NumPy met en cache, une fois pour toutes, la résolution des
+    # types de chaque opération au premier passage dans une branche
+    chauffe = partial(scene(rings, balls).advance, 1.0 / FPS)
+    for _ in range(warmup + frames):
+        chauffe()
+    sim = scene(rings, balls)
+    image = partial(sim.advance, 1.0 / FPS)
+
+    appels = hot_calls(rings, balls)
+    for _ in range(warmup):
+        image()
+    gc.collect()
+    collections = gc.get_stats()[0]["collections"]
+    tracemalloc.start()
+    # Médiane par appel : l'interpréteur alloue parfois pour son compte
+    par_appel = {nom: statistics.median(peak_bytes(appel, calls)) for nom, appel in appels.items()}
+    depart = tracemalloc.get_traced_memory()[0]
+    pic = max(peak_bytes(image, frames))
+    net = tracemalloc.get_traced_memory()[0] - depart
+    tracemalloc.stop()
+    return {
+        "rings": rings,
+        "balls": balls,
+        "frames": frames,
+        "peak_bytes_per_call": par_appel,
+        "peak_bytes_per_frame": pic,
+        "net_bytes": net,
+        "gc_collections": gc.get_stats()[0]["collections"] - collections,
+    }
+
+
+def over_budget(bilan, alloc_budget=ALLOC_BUDGET, call_budget=CALL_BUDGET, log=None):
+    # Noms des mesures d'allocations() hors budget ; log reçoit le détail
+    depasse = []
+    for nom, pic in bilan["peak_bytes_per_call"].items():
+        if log is not None:
+            print(f"{nom:<40} {pic:>6.0f} o/appel", file=log)
+        if pic > call_budget:
+            depasse.append(nom)
+    if log is not None:
+        print(f"{bilan['frames']} images, {bilan['rings']} anneaux, {bilan['balls']} balles : "
+              f"pic {bilan['peak_bytes_per_frame']} o/image, croissance nette {bilan['net_bytes']} o, "
+              f"{bilan['gc_collections']} ramassage(s) GC", file=log)
+    if bilan["peak_bytes_per_frame"] > alloc_budget or bilan["net_bytes"] > alloc_budget:
+        depasse.append("image")
+    if bilan["gc_collections"]:
+        depasse.append("gc")
+    return depasse
+
+
+def run(rings_list=RINGS, balls_list=BALLS, resolutions=RESOLUTIONS, repeats=3, budget=0.2,
+        only=None, log=None):
+    pygame.init()
+    resultats = []
+    for nom, params, fabrique in cases(rings_list, balls_list, resolutions):
+        if only and nom not in only:
+            continue
+        temps, iterations = measure(*fabrique(), repeats=repeats, budget=budget)
+        ligne = {
+            "name": nom,
+            "rings": params.get("rings"),
+            "balls": params.get("balls"),
+            "resolution": params.get("resolution"),
+            "iterations": iterations,
+            "median_us": statistics.median(temps) * 1e6,
+            "min_us": min(temps) * 1e6,
+            "max_us": max(temps) * 1e6,
+        }
+        resultats.append(ligne)
+        if log is not None:
+            print(f"{label(ligne):<48} {ligne['median_us']:>12.1f} µs", file=log, flush=True)
+    return resultats
+
+
+def label(ligne):
+    params = [f"{k}={ligne[k]}" for k in ("rings", "balls", "resolution") if ligne.get(k) is not None]
+    return f"{ligne['name']} " + " ".join(params)
+
+
+def key(ligne):
+    return (ligne["name"], ligne.get("rings"), ligne.get("balls"), ligne.get("resolution"))
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def save(resultats, filename):
+    if filename.endswith(".csv"):
+        with open(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLONNES)
+            writer.writeheader()
+            writer.writerows(resultats)
+    else:
+        with open(filename, "w") as f:
+            json.dump({"environment": environment(), "results": resultats}, f, indent=1)
+
+
+def load(filename):
+    if filename.endswith(".csv"):
+        with open(filename, newline="") as f:
+            lignes = list(csv.DictReader(f))
+        for ligne in lignes:
+            for k in ("rings", "balls", "resolution", "iterations"):
+                ligne[k] = int(ligne[k]) if ligne[k] else None
+            for k in ("median_us", "min_us", "max_us"):
+                ligne[k] = float(ligne[k])
+        return lignes
+    with open(filename) as f:
+        return json.load(f)["results"]
+
+
+def compare(resultats, reference, threshold=1.2, out=sys.stdout):
+    # Rapport temps / référence par cas ; renvoie les cas plus lents que threshold
+    ref = {key(ligne): ligne for ligne in reference}
+    regressions = []
+    for ligne in resultats:
+        base = ref.get(key(ligne))
+        if base is None:
+            continue
+        ratio = ligne["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+        marque = ""
+        if ratio > threshold:
+            marque = "  plus lent"
+            regressions.append((ligne, ratio))
+        elif ratio < 1 / threshold:
+            marque = "  plus rapide"
+        print(f"{label(ligne):<48} {base['median_us']:>12.1f} -> {ligne['median_us']:>12.1f} µs"
+              f"  x{ratio:.2f}{marque}", file=out)
+    return regressions
+
+
+def parse_liste(texte):
+    return [int(v) for v in texte.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesures de performance (physique, collisions, dessin, HUD)")
+    parser.add_argument("--rings", type=parse_liste, default=RINGS, help="nombres d'anneaux : a,b,c")
+    parser.add_argument("--balls", type=parse_liste, default=BALLS, help="nombres de balles : a,b,c")
+    parser.add_argument("--resolutions", type=parse_liste, default=RESOLUTIONS,
+                        help="côtés des surfaces de dessin (pixels) : a,b,c")
+    parser.add_argument("--only", action="append", help="ne mesurer que ce cas (répétable)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=0.2, help="durée minimale d'une répétition (s)")
+    parser.add_argument("--output", help="résultats en .json (avec l'environnement) ou .csv")
+    parser.add_argument("--baseline", help="résultats de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=1.2, help="rapport au-delà duquel un cas régresse")
+    parser.add_argument("--fail", action="store_true", help="code de sortie 1 en cas de régression")
+    parser.add_argument("--allocations", action="store_true",
+                        help="contrôle le budget d'allocation par image (plus petites valeurs de "
+                             "--rings et --balls) au lieu des mesures de temps")
+    parser.add_argument("--alloc-budget", type=int, default=ALLOC_BUDGET,
+                        help="octets temporaires autorisés par image (pic tracemalloc)")
+    parser.add_argument("--call-budget", type=int, default=CALL_BUDGET,
+                        help="octets autorisés par appel du chemin chaud en régime établi (médiane)")
+    args = parser.parse_args()
+
+    if args.allocations:
+        bilan = allocations(min(args.rings), min(args.balls))
+        depasse = over_budget(bilan, args.alloc_budget, args.call_budget, log=sys.stderr)
+        if depasse:
+            print(f"budget d'allocation dépassé : {', '.join(depasse)}", file=sys.stderr)
+        pygame.quit()
+        sys.exit(1 if depasse else 0)
+
+    resultats = run(args.rings, args.balls, args.resolutions, args.repeats, args.budget,
+                    only=args.only, log=sys.stderr)
+    if args.output:
+        save(resultats, args.output)
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(resultats, load(args.baseline), args.threshold)
+        print(f"{len(regressions)} régression(s) au-delà de x{args.threshold}", file=sys.stderr)
+    pygame.quit()
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
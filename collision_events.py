@@ -0,0 +1,129 @@
+import numpy as np
+from ball_system import SQUASH_VERTICAL, SQUASH_HORIZONTAL
+
+# Genres des contacts
+BOUNCE = 0  # rebond sur la partie pleine d'un anneau
+BREAK  = 1  # passage par le trou : l'anneau casse
+
+# Un contact : anneau, balle, genre
+CONTACT_DTYPE = np.dtype([("ring", "<u4"), ("ball", "<u2"), ("kind", "u1")])
+
+
+class CollisionBuffer:
+    # Contacts d'un pas physique, écrits par la détection (RingIndex.sweep)
+    # dans un tableau préalloué qui double quand il est plein
+    def __init__(self, capacity=64):
+        self.records = np.empty(capacity, dtype=CONTACT_DTYPE)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, ring, ball, kind):
+        if self.count == len(self.records):
+            self.records = np.concatenate([self.records, np.empty_like(self.records)])
+        self.records[self.count] = (ring, ball, kind)
+        self.count += 1
+
+    def extend(self, records):
+        # Contacts déjà sous forme de tableau (replay)
+        fin = self.count + len(records)
+        while fin > len(self.records):
+            self.records = np.concatenate([self.records, np.empty_like(self.records)])
+        self.records[self.count:fin] = records
+        self.count = fin
+
+    def view(self):
+        return self.records[:self.count]
+
+    def clear(self):
+        self.count = 0
+
+
+class CollisionBus:
+    # Distribution des contacts d'un pas aux consommateurs, en un passage
+    # après la physique : chaque consommateur reçoit tout le lot
+    # (consume(sim, contacts)). Un pas sans contact ne coûte qu'un test, quel
+    # que soit le nombre de consommateurs.
+    def __init__(self, consumers=()):
+        self.buffer = CollisionBuffer()
+        self.consumers = list(consumers)
+
+    def subscribe(self, consumer):
+        self.consumers.append(consumer)
+        return consumer
+
+    def unsubscribe(self, consumer):
+        self.consumers.remove(consumer)
+
+    def dispatch(self, sim):
+        if self.buffer.count == 0:
+            return
+        contacts = self.buffer.view()
+        for consumer in self.consumers:
+            consumer.consume(sim, contacts)
+        self.buffer.clear()
+
+
+class ScoreConsumer:
+    # Un point par anneau cassé pour la balle et pour son équipe
+    def consume(self, sim, contacts):
+        for ball, kind in zip(contacts["ball"].tolist(), contacts["kind"].tolist()):
+            if kind != BREAK:
+                continue
+            balle = sim.balles[ball]
+            balle.score += 1
+            if balle.team == "YES":
+                sim.yes_score += 1
+            elif balle.team == "NO":
+                sim.no_score += 1
+
+
+class MidiConsumer:
+    # Une note par rebond
+    def consume(self, sim, contacts):
+        midi_manager = sim.midi_manager
+        if midi_manager is None:
+            return
+        for _ in range(contacts["kind"].tolist().count(BOUNCE)):
+            midi_manager.play_next_note()
+
+
+class SquashConsumer:
+    # Effet visuel : squash/stretch d'une balle qui rebondit sur un anneau,
+    # comme sur les bords (étirée dans le sens de sa vitesse)
+    def consume(self, sim, contacts):
+        balles = np.unique(contacts["ball"][contacts["kind"] == BOUNCE])
+        if len(balles) == 0:
+            return
+        systeme = sim.ball_system
+        systeme.scale_timer[balles] = systeme.scale_duration[balles]
+        vel = systeme.vel[balles]
+        vertical = np.abs(vel[:, 1]) > np.abs(vel[:, 0])
+        systeme.target_scale[balles] = np.where(vertical[:, None], SQUASH_VERTICAL, SQUASH_HORIZONTAL)
+
+
+class CollisionStats:
+    # Télémétrie : rebonds et casses par balle, pas avec contact
+    def __init__(self):
+        self.bounces = {}
+        self.breaks = {}
+        self.steps = 0
+        self.max_per_step = 0
+
+    def consume(self, sim, contacts):
+        self.steps += 1
+        self.max_per_step = max(self.max_per_step, len(contacts))
+        for ball, kind in zip(contacts["ball"].tolist(), contacts["kind"].tolist()):
+            compteur = self.breaks if kind == BREAK else self.bounces
+            compteur[ball] = compteur.get(ball, 0) + 1
+
+    def stats(self):
+        return {
+            "bounces": sum(self.bounces.values()),
+            "breaks": sum(self.breaks.values()),
+            "steps_with_contacts": self.steps,
+            "max_per_step": self.max_per_step,
+            "per_ball": {ball: (self.bounces.get(ball, 0), self.breaks.get(ball, 0))
+                         for ball in sorted(self.bounces.keys() | self.breaks.keys())},
+        }
@@ -0,0 +1,104 @@
+import pygame
+
+
+class Compositeur:
+    # Présentation à la fenêtre par rectangles modifiés : seules les zones
+    # qui ont changé (balles, textes animés, cadres dont le texte a changé)
+    # sont redessinées et envoyées avec pygame.display.update(rects). Quand
+    # les anneaux n'ont fait que tourner, seules les zones autour des bords de
+    # leurs trous changent (ArcField.rotation_rects). Si leur forme a changé
+    # ou si les zones dépassent full_ratio de l'écran, on redessine tout et on
+    # fait un flip complet. overlay (facultatif) est dessiné par-dessus ; sa
+    # zone est redessinée quand son contenu change.
+    def __init__(self, screen, rendu, full_ratio=0.5, overlay=None):
+        self.screen     = screen
+        self.rendu      = rendu
+        self.full_ratio = full_ratio
+        self.overlay    = overlay
+
+        self.prev_rects   = None  # None : la prochaine image est complète
+        self.prev_hud     = None
+        self.prev_hud_rects = []
+        self.arcs_shape   = None  # (champ, ArcField.layout) de l'image précédente
+        self.arcs_turn    = None
+        self.prev_overlay = None
+        self.overlay_version = None
+
+        self.full_frames    = 0
+        self.partial_frames = 0
+        self.skipped_frames = 0
+
+    def invalidate(self):
+        self.prev_rects = None
+
+    def present(self, sim):
+        profiler = self.rendu.profiler
+        overlay_rect = self.overlay.rect() if self.overlay is not None else None
+        overlay_version = self.overlay.version if overlay_rect is not None else None
+        profiler.lap("overlay")
+        rects = self.rendu.dynamic_rects(sim)
+        hud   = self.rendu.hud_texts(sim)
+        hud_rects = self.prev_hud_rects if hud == self.prev_hud else self.rendu.hud_rects(sim)
+        profiler.lap("dirty_rects")
+
+        arcs = sim.arcs
+        full = self.prev_rects is None or (arcs, arcs.layout) != self.arcs_shape
+        if not full:
+            dirty = [] if rects == self.prev_rects else rects + self.prev_rects
+            if arcs.turn != self.arcs_turn:
+                anneaux = arcs.rotation_rects(self.screen, self.arcs_turn)
+                if anneaux is None:
+                    full = True
+                else:
+                    dirty += anneaux
+        if not full:
+            if hud != self.prev_hud:
+                # Le cadre suit la largeur du texte : l'ancien peut déborder
+                dirty += hud_rects + self.prev_hud_rects
+            if overlay_rect != self.prev_overlay or overlay_version != self.overlay_version:
+                dirty += [r for r in (overlay_rect, self.prev_overlay) if r is not None]
+            if not dirty:
+                self.skipped_frames += 1
+                return
+
+            # Zones éparses (bords des trous tout autour du centre) : on
+            # compare leur surface cumulée, pas celle de leur union
+            ecran = self.screen.get_rect()
+            dirty = [r.clip(ecran) for r in dirty]
+            dirty = [r for r in dirty if r.width > 0 and r.height > 0]
+            full  = sum(r.width * r.height for r in dirty) > self.full_ratio * ecran.width * ecran.height
+
+        if full:
+            self.rendu.draw(self.screen, sim)
+            self.draw_overlay(overlay_rect)
+            pygame.display.flip()
+            self.full_frames += 1
+        elif dirty:
+            # Seules les zones modifiées sont effacées, redessinées et
+            # envoyées ; ce qui les touche est tracé entier (sans découpe),
+            # le débordement hors des zones n'est jamais envoyé
+            self.rendu.draw(self.screen, sim, dirty)
+            self.draw_overlay(overlay_rect)
+            pygame.display.update(dirty)
+            self.partial_frames += 1
+        profiler.lap("flip")
+
+        self.prev_rects   = rects
+        self.prev_hud     = hud
+        self.prev_hud_rects = hud_rects
+        self.arcs_shape   = (arcs, arcs.layout)
+        self.arcs_turn    = arcs.turn
+        self.prev_overlay = overlay_rect
+        self.overlay_version = overlay_version
+
+    def draw_overlay(self, rect):
+        if rect is not None:
+            self.overlay.draw(self.screen)
+            self.rendu.profiler.lap("overlay")
+
+    def stats(self):
+        return {
+            "full": self.full_frames,
+            "partial": self.partial_frames,
+            "skipped": self.skipped_frames,
+        }
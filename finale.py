@@ -0,0 +1,114 @@
+import os
+import math
+import time
+import pickle
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# Les processus de rendu n'ouvrent jamais de fenêtre
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from simulation import Simulation, WIDTH, HEIGHT, FPS, PHYSICS_HZ
+from rendu import Rendu
+from video_export import VideoExporter
+from rendu_parallele import join_segments
+
+
+def end_of_play(physics_hz=PHYSICS_HZ, state=None, save=None):
+    # Simulation arrêtée au début de la fin (phase de jeu jouée une fois),
+    # ou relue depuis state ; save enregistre cet état pour les fois suivantes
+    if state is not None:
+        with open(state, "rb") as f:
+            return pickle.load(f)
+    sim = Simulation(physics_hz=physics_hz)
+    while sim.game_state == "play":
+        sim.step(sim.physics_dt)
+    if save is not None:
+        with open(save, "wb") as f:
+            pickle.dump(sim, f)
+    return sim
+
+
+def render_at(screen, rendu, sim, t):
+    # Image de la fin à l'instant t, sans passer par les précédentes
+    sim.seek_finale(t)
+    rendu.draw(screen, sim)
+    return screen
+
+
+def render_frames(filename, fps, start, end, etat):
+    # Exécuté dans un processus du pool : images [start, end) de la fin
+    pygame.init()
+    sim = pickle.loads(etat)
+    rendu = Rendu()
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    exporter = VideoExporter(filename, WIDTH, HEIGHT, fps)
+    for frame in range(start, end):
+        exporter.submit(render_at(screen, rendu, sim, frame / fps), frame)
+    exporter.close()
+    return exporter.stats()
+
+
+def render_finale(output, sim, fps=FPS, workers=None):
+    # Toute la fin, découpée en autant de segments que de processus
+    workers = workers or os.cpu_count() or 1
+    total = math.ceil(sim.finale.duration * fps) + 1
+    taille = math.ceil(total / workers)
+    etat = pickle.dumps(sim)
+
+    extension = os.path.splitext(output)[1] or ".y4m"
+    dossier = tempfile.mkdtemp(prefix="finale_", dir=os.path.dirname(os.path.abspath(output)))
+    bornes = [(debut, min(debut + taille, total)) for debut in range(0, total, taille)]
+    fichiers = [os.path.join(dossier, f"segment_{i:04d}{extension}") for i in range(len(bornes))]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_frames, nom, fps, debut, fin, etat)
+                       for nom, (debut, fin) in zip(fichiers, bornes)]
+            stats = [f.result() for f in futures]
+        join_segments(fichiers, output)
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+    return total, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aperçu et rendu de la fin de partie, sans rejouer la phase de jeu")
+    parser.add_argument("--state", help="état de fin de phase de jeu enregistré par --save-state")
+    parser.add_argument("--save-state", help="enregistre l'état de fin de phase de jeu dans ce fichier")
+    parser.add_argument("--physics-hz", type=int, default=PHYSICS_HZ)
+    parser.add_argument("--at", type=lambda t: [float(v) for v in t.split(",")], default=[],
+                        help="instants (s depuis la fin du jeu) à rendre en PNG : a,b,c")
+    parser.add_argument("--prefix", default="finale", help="préfixe des fichiers PNG")
+    parser.add_argument("--output", help="toute la fin en vidéo (.mp4 via ffmpeg, sinon .y4m)")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--workers", type=int, default=None, help="processus de rendu (défaut : nombre de coeurs)")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    sim = end_of_play(args.physics_hz, args.state, args.save_state)
+    print(f"Fin de la phase de jeu en {time.perf_counter() - debut:.2f} s ; fin de partie : "
+          + ", ".join(f"{p.name} {p.start:.2f}-{p.start + p.duration:.2f} s" for p in sim.finale.phases))
+
+    if args.at:
+        pygame.init()
+        rendu = Rendu()
+        screen = pygame.Surface((WIDTH, HEIGHT))
+        for t in args.at:
+            nom = f"{args.prefix}_{t:06.3f}.png"
+            pygame.image.save(render_at(screen, rendu, sim, t), nom)
+            print(f"{t:.3f} s : {sim.game_state} -> {nom}")
+
+    if args.output:
+        debut = time.perf_counter()
+        total, stats = render_finale(args.output, sim, args.fps, args.workers)
+        duree = time.perf_counter() - debut
+        print(f"{total} images en {len(stats)} segments, rendues en {duree:.2f} s "
+              f"({total / duree:.1f} images/s)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
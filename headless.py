@@ -0,0 +1,113 @@
+import os
+import time
+import argparse
+
+# Pilote vidéo factice : aucune fenêtre, utilisable sur les serveurs de rendu
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from simulation import Simulation, WIDTH, HEIGHT, FPS, PHYSICS_HZ, MIDI_FILE
+from rendu import Rendu
+from video_export import VideoExporter
+from midi_manager import MidiManager
+from snapshot import load_snapshot
+from replay import Recorder
+from collision_events import CollisionStats, SquashConsumer
+
+
+def run_headless(fps=FPS, max_frames=None, render=True, on_frame=None, sim=None, physics_hz=PHYSICS_HZ,
+                 rendu=None, recorder=None, first_frame=0):
+    # Avance la simulation avec un dt fixe, aussi vite que le CPU le permet
+    # (pas de clock.tick). on_frame(screen, frame) reçoit chaque image rendue ;
+    # recorder (replay.Recorder) prend ses instantanés avant chaque image.
+    # first_frame : numéro de la première image (reprise d'un instantané).
+    pygame.init()
+    dt = 1.0 / fps
+    if sim is None:
+        sim = Simulation(physics_hz=physics_hz)
+    screen = pygame.Surface((WIDTH, HEIGHT)) if render else None
+    if render and rendu is None:
+        rendu = Rendu()
+
+    frames = first_frame
+    debut = time.perf_counter()
+    while not sim.finished and (max_frames is None or frames < max_frames):
+        if recorder is not None:
+            recorder.on_frame(sim, frames)
+        sim.advance(dt)
+        if render:
+            rendu.draw(screen, sim)
+            if on_frame is not None:
+                on_frame(screen, frames)
+        frames += 1
+    duree = time.perf_counter() - debut
+
+    return sim, frames, duree
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation sans fenêtre, plus rapide que le temps réel")
+    parser.add_argument("--fps", type=int, default=FPS, help="images par seconde rendues (dt = 1/fps)")
+    parser.add_argument("--physics-hz", type=int, default=PHYSICS_HZ, help="pas physiques par seconde")
+    parser.add_argument("--frames", type=int, default=None, help="nombre maximal d'images")
+    parser.add_argument("--no-render", action="store_true", help="physique seule, sans dessin")
+    parser.add_argument("--output", help="fichier vidéo (.mp4 via ffmpeg, sinon .y4m)")
+    parser.add_argument("--slots", type=int, default=8, help="taille de l'anneau de tampons d'images")
+    parser.add_argument("--drop", action="store_true", help="perdre les images plutôt qu'attendre l'encodeur")
+    parser.add_argument("--midi", help="enregistre les notes jouées dans ce fichier .mid (sans périphérique)")
+    parser.add_argument("--record", metavar="PREFIXE",
+                        help="enregistre PREFIXE.replay (contacts, trace des balles) et PREFIXE.snap (instantanés)")
+    parser.add_argument("--every", type=int, default=600, help="images entre deux instantanés")
+    parser.add_argument("--resume", metavar="FICHIER", help="reprend au dernier instantané de ce fichier .snap")
+    parser.add_argument("--resume-frame", type=int, help="reprend au dernier instantané avant cette image")
+    parser.add_argument("--squash-rings", action="store_true",
+                        help="squash/stretch des balles aussi sur les rebonds contre les anneaux")
+    args = parser.parse_args()
+
+    exporter = None
+    if args.output:
+        exporter = VideoExporter(args.output, WIDTH, HEIGHT, args.fps, slots=args.slots, block=not args.drop)
+
+    midi_manager = MidiManager(MIDI_FILE, record=True) if args.midi else None
+
+    pygame.init()
+    rendu = None if args.no_render else Rendu()
+    first_frame = 0
+    if args.resume:
+        first_frame, sim = load_snapshot(args.resume, args.resume_frame, midi_manager)
+        print(f"Reprise à l'image {first_frame}")
+    else:
+        sim = Simulation(midi_manager=midi_manager, physics_hz=args.physics_hz)
+    contacts = sim.collisions.subscribe(CollisionStats())
+    if args.squash_rings:
+        sim.collisions.subscribe(SquashConsumer())
+    recorder = Recorder(sim, args.every, args.record + ".snap") if args.record else None
+    sim, frames, duree = run_headless(args.fps, args.frames, render=not args.no_render,
+                                      on_frame=exporter.submit if exporter else None,
+                                      sim=sim, rendu=rendu, recorder=recorder, first_frame=first_frame)
+    if recorder is not None:
+        recorder.save(args.record + ".replay")
+        print(f"Enregistrement : {recorder.contacts} contacts, {recorder.writer.count} instantanés "
+              f"({recorder.writer.bytes} octets)")
+    frames -= first_frame
+    stats = contacts.stats()
+    print(f"Contacts : {stats['bounces']} rebonds, {stats['breaks']} anneaux cassés "
+          f"({stats['steps_with_contacts']} pas, au plus {stats['max_per_step']} par pas)")
+    if midi_manager is not None:
+        midi_manager.save_midi(args.midi, sim.physics_dt)
+        print("MIDI :", midi_manager.stats())
+    if exporter is not None:
+        exporter.close()
+        print("Export :", exporter.stats())
+    images_par_seconde = frames / duree if duree > 0 else float("inf")
+    print(f"{frames} images simulées en {duree:.2f} s : {images_par_seconde:.1f} images/s "
+          f"(x{images_par_seconde / args.fps:.2f} temps réel)")
+    yes_score, no_score = sim.scores
+    print(f"Etat : {sim.game_state}  Yes : {yes_score}  No : {no_score}")
+    if rendu is not None:
+        print("Textes :", rendu.text.stats())
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,301 @@
+import os
+import math
+import time
+import queue
+import struct
+import hashlib
+import threading
+import numpy as np
 import pygame.midi
-import mido
+
+# Cache compilé des notes : fichier binaire à côté du .mid, identifié par le
+# hash du MIDI. En-tête puis (note, vélocité, durée en ms), lu par mmap.
+CACHE_SUFFIX  = ".notes"
+CACHE_MAGIC   = b"MIDINOTE"
+CACHE_VERSION = 2
+CACHE_HEADER  = struct.Struct("<8sI32sI")  # magic, version, sha256, nombre de notes
+NOTE_DTYPE    = np.dtype([("note", "u1"), ("velocity", "u1"), ("duration", "<u2")])
+
+DEFAULT_DURATION = 0.5    # note sans note_off (s)
+DEFAULT_TEMPO    = 500000  # µs par noire
+
+
+def midi_hash(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 16), b""):
+            digest.update(bloc)
+    return digest.digest()
+
+
+def parse_midi(filename):
+    # mido n'est importé que si le cache manque ou est périmé
+    import mido
+
+    notes = []
+    mid = mido.MidiFile(filename)
+    tempo = next((msg.tempo for track in mid.tracks for msg in track if msg.type == 'set_tempo'),
+                 DEFAULT_TEMPO)
+    for track in mid.tracks:
+        ticks = 0
+        ouvertes = {}  # (canal, note) -> indices des notes en cours
+        for msg in track:
+            ticks += msg.time
+            if msg.type == 'note_on' and msg.velocity > 0:
+                ouvertes.setdefault((msg.channel, msg.note), []).append((len(notes), ticks))
+                notes.append([msg.note, msg.velocity, int(DEFAULT_DURATION * 1000)])
+            elif msg.type in ('note_off', 'note_on') and ouvertes.get((msg.channel, msg.note)):
+                i, debut = ouvertes[(msg.channel, msg.note)].pop(0)
+                duree = mido.tick2second(ticks - debut, mid.ticks_per_beat, tempo)
+                notes[i][2] = min(int(round(duree * 1000)), 0xFFFF)
+    table = np.zeros(len(notes), dtype=NOTE_DTYPE)
+    for i, (note, velocity, duree) in enumerate(notes):
+        table[i] = (note, velocity, duree)
+    return table
+
+
+def read_cache(cache, digest):
+    try:
+        with open(cache, "rb") as f:
+            entete = f.read(CACHE_HEADER.size)
+    except OSError:
+        return None
+    if len(entete) != CACHE_HEADER.size:
+        return None
+    magic, version, hash_cache, count = CACHE_HEADER.unpack(entete)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or hash_cache != digest:
+        return None
+    if os.path.getsize(cache) != CACHE_HEADER.size + NOTE_DTYPE.itemsize * count:
+        return None
+    if count == 0:
+        return np.zeros(0, dtype=NOTE_DTYPE)
+    return np.memmap(cache, dtype=NOTE_DTYPE, mode="r", offset=CACHE_HEADER.size, shape=(count,))
+
+
+def write_cache(cache, digest, notes):
+    # Ecriture atomique ; un dossier en lecture seule n'empêche pas de jouer
+    tmp = cache + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, digest, len(notes)))
+            f.write(np.ascontiguousarray(notes, dtype=NOTE_DTYPE).tobytes())
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+
+
+def load_notes(filename):
+    digest = midi_hash(filename)
+    cache = filename + CACHE_SUFFIX
+    notes = read_cache(cache, digest)
+    if notes is None:
+        notes = parse_midi(filename)
+        write_cache(cache, digest, notes)
+    return notes
+
+
+class TimingWheel:
+    # Roue temporelle : un seau par tranche de `resolution` secondes. Planifier
+    # et faire avancer coûtent O(1) par note, quel que soit le nombre en attente.
+    def __init__(self, resolution=0.01, slots=512, now=0.0):
+        self.resolution = resolution
+        self.buckets = [[] for _ in range(slots)]
+        self.tick = int(now / resolution)  # dernier tick traité
+        self.pending = 0
+
+    def schedule(self, when, item):
+        tick = max(int(math.ceil(when / self.resolution)), self.tick + 1)
+        self.buckets[tick % len(self.buckets)].append((tick, item))
+        self.pending += 1
+
+    def next_deadline(self):
+        return (self.tick + 1) * self.resolution
+
+    def advance(self, now):
+        # Renvoie les éléments arrivés à échéance
+        cible = int(now / self.resolution)
+        dus = []
+        if cible - self.tick >= len(self.buckets):
+            # Retard de plus d'un tour : un seul passage sur tous les seaux
+            ticks = range(len(self.buckets))
+        else:
+            ticks = range(self.tick + 1, cible + 1)
+        for tick in ticks:
+            seau = self.buckets[tick % len(self.buckets)]
+            if seau:
+                restants = [(t, item) for t, item in seau if t > cible]
+                dus.extend(item for t, item in seau if t <= cible)
+                seau[:] = restants
+        self.tick = max(self.tick, cible)
+        self.pending -= len(dus)
+        return dus
+
+    def drain(self):
+        dus = [item for seau in self.buckets for _, item in seau]
+        for seau in self.buckets:
+            seau.clear()
+        self.pending = 0
+        return dus
+
+
+class MidiOutputThread:
+    # Sortie MIDI sur un thread dédié : la boucle physique ne fait que déposer
+    # la note dans une file bornée (jamais d'attente sur le périphérique ; si
+    # la file est pleine la note est perdue et comptée). Les note_off sont
+    # planifiés dans une roue temporelle d'après la durée de chaque note.
+    def __init__(self, output, maxsize=256, resolution=0.01):
+        self.output = output
+        self.queue  = queue.Queue(maxsize)
+        self.wheel  = TimingWheel(resolution, now=time.perf_counter())
+        self.actives = {}  # note -> nombre de note_on sans note_off
+
+        self.sent    = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+        self.latency_max   = 0.0
+
+        self.thread = threading.Thread(target=self._run, name="midi-output", daemon=True)
+        self.thread.start()
+
+    def note_on(self, note, velocity, duration):
+        try:
+            self.queue.put_nowait((note, velocity, duration, time.perf_counter()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self.wheel.pending:
+                timeout = max(0.0, self.wheel.next_deadline() - time.perf_counter())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is StopIteration:
+                break
+
+            now = time.perf_counter()
+            if item is not None:
+                note, velocity, duration, depose = item
+                self.output.note_on(note, velocity)
+                self.actives[note] = self.actives.get(note, 0) + 1
+                self.wheel.schedule(now + duration, note)
+                self.sent += 1
+                latence = now - depose
+                self.latency_total += latence
+                self.latency_max = max(self.latency_max, latence)
+
+            for note in self.wheel.advance(now):
+                self._note_off(note)
+
+        self.all_notes_off()
+
+    def _note_off(self, note):
+        # Une note rejouée avant la fin de la précédente n'est coupée qu'au dernier note_off
+        restantes = self.actives.get(note, 0) - 1
+        if restantes > 0:
+            self.actives[note] = restantes
+            return
+        self.actives.pop(note, None)
+        self.output.note_off(note, 0)
+
+    def all_notes_off(self):
+        for note in self.wheel.drain():
+            self._note_off(note)
+        for canal in range(16):
+            self.output.write_short(0xB0 | canal, 123, 0)  # All Notes Off
+        self.actives.clear()
+
+    def stats(self):
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+            "latency_mean": self.latency_total / self.sent if self.sent else 0.0,
+            "latency_max": self.latency_max,
+        }
+
+    def close(self):
+        # Vide la file puis envoie All Notes Off avant de rendre la main
+        self.queue.put(StopIteration)
+        self.thread.join()
 
 
 class MidiManager:
-    def __init__(self, filename):
+    # record=True : aucun périphérique n'est ouvert, chaque note déclenchée est
+    # notée avec le pas et le temps de simulation (set_clock), puis save_midi
+    # écrit un fichier MIDI aligné image par image sur la vidéo exportée.
+    def __init__(self, filename, output=None, record=False):
         self.notes = []
         self.index = 0
         self.last_note_time = 0
-        self.output = pygame.midi.Output(0)
+        self.record = record
+        self.events = []  # (pas, temps, note, vélocité, durée)
+        self.frame  = 0
+        self.time   = 0.0
+        if record:
+            self.output = None
+            self.sortie = None
+        else:
+            self.output = output if output is not None else pygame.midi.Output(0)
+            self.sortie = MidiOutputThread(self.output)
         self.load_midi(filename)
 
     def load_midi(self, filename):
-        mid = mido.MidiFile(filename)
-        for track in mid.tracks:
-            for msg in track:
-                if msg.type == 'note_on' and msg.velocity > 0:
-                    self.notes.append((msg.note, msg.velocity))
+        self.notes = load_notes(filename)
+
+    def set_clock(self, frame, t):
+        # Horloge de simulation (pas physique courant et temps en secondes)
+        self.frame = frame
+        self.time  = t
 
     def play_next_note(self):
-        now = pygame.time.get_ticks()
+        now = self.time * 1000 if self.record else pygame.time.get_ticks()
         if self.index < len(self.notes) and now - self.last_note_time >= 100:
-            note, velocity = self.notes[self.index]
-            self.output.note_on(note, velocity)
+            note = self.notes[self.index]
+            velocity = int(note["velocity"])
+            duration = int(note["duration"]) / 1000.0
+            if self.record:
+                self.events.append((self.frame, self.time, int(note["note"]), velocity, duration))
+            else:
+                self.sortie.note_on(int(note["note"]), velocity, duration)
             self.index += 1
             self.last_note_time = now
+
+    def save_midi(self, filename, step_dt):
+        # Un tick MIDI = un pas physique : tempo d'une seconde par noire et
+        # ticks_per_beat = pas par seconde
+        import mido
+
+        ticks_per_beat = int(round(1.0 / step_dt))
+        messages = []
+        for frame, _, note, velocity, duration in self.events:
+            fin = frame + max(1, int(round(duration / step_dt)))
+            messages.append((frame, 1, mido.Message('note_on', note=note, velocity=velocity)))
+            messages.append((fin, 0, mido.Message('note_off', note=note, velocity=0)))
+        messages.sort(key=lambda m: (m[0], m[1]))  # note_off avant note_on au même tick
+
+        track = mido.MidiTrack()
+        track.append(mido.MetaMessage('set_tempo', tempo=1000000, time=0))
+        precedent = 0
+        for tick, _, msg in messages:
+            track.append(msg.copy(time=tick - precedent))
+            precedent = tick
+        track.append(mido.MetaMessage('end_of_track', time=0))
+
+        mid = mido.MidiFile(ticks_per_beat=ticks_per_beat)
+        mid.tracks.append(track)
+        mid.save(filename)
+
+    def stats(self):
+        if self.record:
+            return {"recorded": len(self.events)}
+        return self.sortie.stats()
+
+    def close(self):
+        if self.sortie is not None:
+            self.sortie.close()
+            self.output.close()
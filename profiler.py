@@ -0,0 +1,156 @@
+import csv
+import json
+import time
+from collections import deque
+import numpy as np
+import pygame
+from text_cache import TextCache
+
+PERCENTILES = (50, 95, 99)
+
+
+class NullProfiler:
+    # Profileur désactivé : chaque point de mesure est un appel vide
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def lap(self, name):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class FrameProfiler:
+    # Temps par étape et par image. lap(name) attribue à name le temps écoulé
+    # depuis le point de mesure précédent : les étapes sont exclusives et leur
+    # somme fait le temps de l'image. Les percentiles portent sur les window
+    # dernières images ; l'historique complet sert à l'export.
+    enabled = True
+
+    def __init__(self, window=600, clock=time.perf_counter):
+        self.window  = window
+        self.clock   = clock
+        self.samples = {}   # étape -> deque des window derniers temps (s)
+        self.history = []   # un dictionnaire {étape: temps} par image
+        self.current = {}
+        self.frame_start = self.last = clock()
+
+    def begin_frame(self):
+        self.current = {}
+        self.frame_start = self.last = self.clock()
+
+    def lap(self, name):
+        now = self.clock()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.last)
+        self.last = now
+
+    def end_frame(self):
+        self.current["frame"] = self.clock() - self.frame_start
+        for name, duree in self.current.items():
+            serie = self.samples.get(name)
+            if serie is None:
+                serie = self.samples[name] = deque(maxlen=self.window)
+            serie.append(duree)
+        self.history.append(self.current)
+        self.current = {}
+
+    def stages(self):
+        # Étapes dans l'ordre de première apparition, "frame" en dernier
+        noms = [name for name in self.samples if name != "frame"]
+        if "frame" in self.samples:
+            noms.append("frame")
+        return noms
+
+    def percentiles(self, name, source=None):
+        valeurs = np.fromiter(source if source is not None else self.samples[name], dtype=np.float64)
+        return dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(valeurs, PERCENTILES).tolist()))
+
+    def summary(self):
+        # Statistiques sur tout l'historique (les images sans l'étape comptent 0)
+        resume = {}
+        for name in self.stages():
+            valeurs = [image.get(name, 0.0) for image in self.history]
+            stats = self.percentiles(name, valeurs)
+            stats["mean"] = sum(valeurs) / len(valeurs)
+            stats["max"] = max(valeurs)
+            resume[name] = stats
+        return {"frames": len(self.history), "stages": resume}
+
+    def export(self, filename):
+        # .csv : une ligne par image (secondes) ; sinon résumé JSON
+        if filename.endswith(".csv"):
+            noms = self.stages()
+            with open(filename, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame_index"] + noms)
+                for i, image in enumerate(self.history):
+                    writer.writerow([i] + [image.get(name, 0.0) for name in noms])
+        else:
+            with open(filename, "w") as f:
+                json.dump(self.summary(), f, indent=1)
+
+
+class ProfilerOverlay:
+    # Tableau p50/p95/p99 (ms) en haut à gauche de l'écran, affiché ou masqué
+    # par toggle(). Le texte n'est recalculé que toutes les refresh secondes ;
+    # version change alors pour que le Compositeur redessine la zone.
+    def __init__(self, profiler, text_cache=None, refresh=0.5, size=18, position=(10, 10)):
+        self.profiler = profiler
+        self.text     = text_cache or TextCache(font_name="monospace")
+        self.refresh  = refresh
+        self.size     = size
+        self.position = position
+        self.visible  = False
+        self.version  = 0
+        self.lines    = []
+        self.surface  = None
+        self.updated  = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.updated = None
+
+    def update(self):
+        now = self.profiler.clock()
+        if self.updated is not None and now - self.updated < self.refresh:
+            return
+        self.updated = now
+        lignes = [f"{'étape':<16}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for name in self.profiler.stages():
+            p = self.profiler.percentiles(name)
+            lignes.append(f"{name:<16}" + "".join(f"{p[f'p{q}'] * 1000:>7.2f}" for q in PERCENTILES))
+        self.lines = lignes
+        self.surface = None
+        self.version += 1
+
+    def build(self):
+        rendus = [self.text.render(ligne, self.size, (255, 255, 255)) for ligne in self.lines]
+        largeur = max((r.get_width() for r in rendus), default=0) + 12
+        hauteur = sum(r.get_height() for r in rendus) + 12
+        surface = pygame.Surface((largeur, hauteur))
+        surface.fill((0, 0, 0))
+        y = 6
+        for r in rendus:
+            surface.blit(r, (6, y))
+            y += r.get_height()
+        return surface
+
+    def rect(self):
+        # Zone couverte, ou None si masqué
+        if not self.visible:
+            return None
+        self.update()
+        if self.surface is None:
+            self.surface = self.build()
+        return self.surface.get_rect(topleft=self.position)
+
+    def draw(self, screen):
+        rect = self.rect()
+        if rect is not None:
+            screen.blit(self.surface, rect)
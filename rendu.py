@@ -0,0 +1,127 @@
+import pygame
+from simulation import WIDTH, HEIGHT, BG_COLOR, WHITE
+from text_cache import TextCache
+from profiler import NULL_PROFILER
+
+TITLE = "Are you GAY? (respectfully)"
+
+
+class Rendu:
+    # Dessine l'état d'une Simulation sur une surface (fenêtre ou hors écran)
+    def __init__(self, profiler=NULL_PROFILER):
+        self.text = TextCache()
+        self.profiler = profiler
+        self.hud_static = None  # calque du titre, rendu une seule fois
+        self.hud_static_rect = None
+
+    def draw(self, screen, sim, rects=None):
+        # rects : seules ces zones sont effacées et redessinées (compositeur) ;
+        # les anneaux et balles qui les touchent sont tracés entiers, et
+        # peuvent déborder hors des zones
+        profiler = self.profiler
+        profiler.lap("render")
+        if rects is None:
+            screen.fill(BG_COLOR)
+        else:
+            for rect in rects:
+                screen.fill(BG_COLOR, rect)
+        profiler.lap("clear")
+        sim.arcs.draw(screen, rects=rects)
+        profiler.lap("draw_arcs")
+        self.draw_balls(screen, sim, rects)
+        profiler.lap("draw_balls")
+        self.draw_hud(screen, sim)
+        profiler.lap("draw_text")
+
+    def draw_balls(self, screen, sim, rects=None):
+        # rects : seules les balles dont le dessin ou l'étiquette les touche
+        for b in sim.balles:
+            if b.radius > 1:
+                label = self.ball_label(b, sim.alpha) if b.team is not None else None
+                if rects is not None and b.bounds(sim.alpha).collidelist(rects) < 0 and (
+                        label is None or label[1].collidelist(rects) < 0):
+                    continue
+                b.draw(screen, sim.alpha)
+
+                # Dessin du texte centré sur la balle
+                if label is not None:
+                    screen.blit(*label)
+
+    def ball_label(self, b, alpha):
+        pos = b.render_pos(alpha)
+
+        # Label : l'équipe de la balle
+        label = b.team
+
+        # Taille du texte proportionnelle à la taille de la balle
+        font_size = int(b.radius * 0.9)  # Ajuste le facteur si besoin
+
+        # Surface texte (arrondie : le rayon varie pendant les animations)
+        label_surf = self.text.render(label, font_size, (255, 255, 255), animated=True)
+        return label_surf, label_surf.get_rect(center=(int(pos.x), int(pos.y)))
+
+    def static_layer(self):
+        # Titre et son cadre noir : ne change jamais
+        if self.hud_static is None:
+            title_surf = self.text.render(TITLE, 46, (255, 255, 255))
+            title_rect = title_surf.get_rect(center=(WIDTH // 2, 250))
+            self.hud_static_rect = title_rect.inflate(20, 10)
+            self.hud_static = pygame.Surface(self.hud_static_rect.size)
+            self.hud_static.fill((0, 0, 0))
+            self.hud_static.blit(title_surf, title_rect.move(-self.hud_static_rect.x, -self.hud_static_rect.y))
+        return self.hud_static, self.hud_static_rect
+
+    def hud_texts(self, sim):
+        minutes = int(sim.timer) // 60
+        seconds = int(sim.timer) % 60
+        return f"Yes : {sim.yes_score}", f"No : {sim.no_score}", f"{minutes:02d}:{seconds:02d}"
+
+    def hud_boxes(self, sim):
+        # (surface, rectangle du texte) des cadres de score et du chrono
+        yes_text, no_text, timer_text = self.hud_texts(sim)
+
+        yes_surf = self.text.render(yes_text, 46, (0, 255, 0))
+        no_surf = self.text.render(no_text, 46, (255, 0, 0))
+        timer_surf = self.text.render(timer_text, 50, WHITE)
+        return [
+            (yes_surf, yes_surf.get_rect(center=(WIDTH // 2 - 120, 300))),
+            (no_surf, no_surf.get_rect(center=(WIDTH // 2 + 120, 300))),
+            (timer_surf, timer_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 300))),
+        ]
+
+    def winner_text(self, sim):
+        # Affichage "Winner!" animé
+        if sim.game_state == "done" and sim.winner_font_timer > 0:
+            t = 1.0 - (sim.winner_font_timer / sim.winner_font_duration)
+            font_size = int(20 + t * (sim.winner_font_max_size - 20))
+            winner_surf = self.text.render("Winner!", font_size, (255, 255, 0), animated=True)
+            return winner_surf, winner_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
+        return None
+
+    def draw_hud(self, screen, sim):
+        hud_surf, hud_rect = self.static_layer()
+        screen.blit(hud_surf, hud_rect)
+
+        for surf, rect in self.hud_boxes(sim):
+            pygame.draw.rect(screen, (0, 0, 0), rect.inflate(20, 10))
+            screen.blit(surf, rect)
+
+        winner = self.winner_text(sim)
+        if winner is not None:
+            screen.blit(*winner)
+
+    def dynamic_rects(self, sim):
+        # Zones des éléments qui bougent d'une image à l'autre (hors anneaux)
+        rects = []
+        for b in sim.balles:
+            if b.radius > 1:
+                rects.append(b.bounds(sim.alpha))
+                if b.team is not None:
+                    rects.append(self.ball_label(b, sim.alpha)[1])
+        winner = self.winner_text(sim)
+        if winner is not None:
+            rects.append(winner[1])
+        return rects
+
+    def hud_rects(self, sim):
+        return [rect.inflate(20, 10) for _, rect in self.hud_boxes(sim)]
@@ -0,0 +1,121 @@
+import os
+import time
+import pickle
+import shutil
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+# Les processus de rendu n'ouvrent jamais de fenêtre
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from simulation import Simulation, WIDTH, HEIGHT, FPS, PHYSICS_HZ, MIDI_FILE
+from rendu import Rendu
+from video_export import VideoExporter
+from midi_manager import MidiManager
+
+SEGMENT_SECONDS = 4.0
+
+
+def checkpoints(fps, segment_frames, max_frames=None, physics_hz=PHYSICS_HZ, midi_manager=None):
+    # Passe physique seule (très rapide) : un instantané de la simulation au
+    # début de chaque segment. L'image n est dessinée après n + 1 avancées.
+    dt = 1.0 / fps
+    sim = Simulation(midi_manager=midi_manager, physics_hz=physics_hz)
+    points = []
+    frame = 0
+    while not sim.finished and (max_frames is None or frame < max_frames):
+        if frame % segment_frames == 0:
+            points.append((frame, pickle.dumps(sim)))
+        sim.advance(dt)
+        frame += 1
+    return points, frame
+
+
+def render_segment(filename, fps, start, end, etat):
+    # Exécuté dans un processus du pool : repart à froid de l'instantané
+    pygame.init()
+    dt = 1.0 / fps
+    sim = pickle.loads(etat)
+    rendu = Rendu()
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    exporter = VideoExporter(filename, WIDTH, HEIGHT, fps)
+    for frame in range(start, end):
+        sim.advance(dt)
+        rendu.draw(screen, sim)
+        exporter.submit(screen, frame)
+    exporter.close()
+    return exporter.stats()
+
+
+def join_segments(fichiers, output):
+    # Concatène les segments dans l'ordre
+    if output.endswith(".y4m") or not shutil.which("ffmpeg"):
+        with open(output, "wb") as sortie:
+            for i, nom in enumerate(fichiers):
+                with open(nom, "rb") as segment:
+                    entete = segment.readline()
+                    if i == 0:
+                        sortie.write(entete)
+                    shutil.copyfileobj(segment, sortie)
+        return
+
+    liste = output + ".segments.txt"
+    with open(liste, "w") as f:
+        for nom in fichiers:
+            f.write(f"file '{os.path.abspath(nom)}'\n")
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                    "-i", liste, "-c", "copy", output], check=True)
+    os.remove(liste)
+
+
+def render_parallel(output, fps=FPS, workers=None, segment_seconds=SEGMENT_SECONDS, max_frames=None,
+                    physics_hz=PHYSICS_HZ, midi=None):
+    # midi : fichier .mid où enregistrer les notes de la passe physique
+    segment_frames = max(1, int(round(segment_seconds * fps)))
+    midi_manager = MidiManager(MIDI_FILE, record=True) if midi else None
+    points, total = checkpoints(fps, segment_frames, max_frames, physics_hz, midi_manager)
+    if midi_manager is not None:
+        midi_manager.save_midi(midi, 1.0 / physics_hz)
+
+    extension = os.path.splitext(output)[1] or ".y4m"
+    dossier = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output)))
+    fichiers = [os.path.join(dossier, f"segment_{i:04d}{extension}") for i in range(len(points))]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for i, (start, etat) in enumerate(points):
+                end = min(start + segment_frames, total)
+                futures.append(pool.submit(render_segment, fichiers[i], fps, start, end, etat))
+            stats = [f.result() for f in futures]
+        join_segments(fichiers, output)
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    return total, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendu vidéo en parallèle par segments")
+    parser.add_argument("output", help="fichier vidéo (.mp4 via ffmpeg, sinon .y4m)")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--physics-hz", type=int, default=PHYSICS_HZ)
+    parser.add_argument("--workers", type=int, default=None, help="processus de rendu (défaut : nombre de coeurs)")
+    parser.add_argument("--segment", type=float, default=SEGMENT_SECONDS, help="durée d'un segment (s)")
+    parser.add_argument("--frames", type=int, default=None, help="nombre maximal d'images")
+    parser.add_argument("--midi", help="enregistre les notes jouées dans ce fichier .mid")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    total, stats = render_parallel(args.output, args.fps, args.workers, args.segment, args.frames,
+                                   args.physics_hz, args.midi)
+    duree = time.perf_counter() - debut
+    print(f"{total} images en {len(stats)} segments, rendues en {duree:.2f} s "
+          f"({total / duree:.1f} images/s)")
+
+
+if __name__ == "__main__":
+    main()
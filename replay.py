@@ -0,0 +1,179 @@
+import os
+import zlib
+import time
+import struct
+import argparse
+
+# Le rendu d'un replay n'ouvre jamais de fenêtre
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from collision_events import BREAK, CONTACT_DTYPE
+from simulation import Simulation, WIDTH, HEIGHT, FPS, RAYON_DEPART
+from snapshot import SnapshotWriter, encode_state, decode_state
+from rendu import Rendu
+from video_export import VideoExporter
+
+# Fichier de replay : en-tête, instantané de départ, puis (compressés) le
+# journal des contacts et la trace des balles à chaque pas de la phase de jeu.
+# C'est tout ce qu'il faut pour redessiner la partie sans refaire la physique.
+REPLAY_MAGIC   = b"SIMREPLY"
+REPLAY_VERSION = 1
+REPLAY_HEADER  = struct.Struct("<8sIIII")  # magic, version, contacts, pas, taille de l'instantané
+
+# Un contact : pas physique, anneau, balle, BOUNCE (rebond) ou BREAK (casse)
+EVENT_DTYPE = np.dtype([("step", "<u4"), ("ring", "<u4"), ("ball", "<u2"), ("kind", "u1")])
+# Une balle à un pas : position (exacte, la fin de partie en repart) et squash/stretch
+TRACK_DTYPE = np.dtype([("pos", "<f8", (2,)), ("scale", "<f4", (2,))])
+
+
+class Recorder:
+    # Enregistre une Simulation : contacts (consommateur de
+    # Simulation.collisions) et trace des balles à chaque pas
+    # (Simulation.recorder), instantané complet toutes les every images dans
+    # snapshots (on_frame, appelé par la boucle d'affichage)
+    def __init__(self, sim, every=600, snapshots=None):
+        self.initial  = encode_state(sim)
+        self.every    = every
+        self.writer   = SnapshotWriter(snapshots) if snapshots else None
+        self.events   = []  # un tableau EVENT_DTYPE par pas avec contacts
+        self.contacts = 0
+        self.track    = []
+        sim.recorder = self
+        sim.collisions.subscribe(self)
+
+    def consume(self, sim, contacts):
+        ligne = np.empty(len(contacts), dtype=EVENT_DTYPE)
+        ligne["step"] = sim.step_count
+        for nom in CONTACT_DTYPE.names:
+            ligne[nom] = contacts[nom]
+        self.events.append(ligne)
+        self.contacts += len(ligne)
+
+    def on_step(self, sim):
+        if sim.game_state == "play":
+            ligne = np.empty(len(sim.ball_system), dtype=TRACK_DTYPE)
+            ligne["pos"] = sim.ball_system.pos
+            ligne["scale"] = sim.ball_system.scale
+            self.track.append(ligne)
+
+    def on_frame(self, sim, frame):
+        if self.writer is not None and frame % self.every == 0:
+            self.writer.write(frame, sim)
+
+    def save(self, filename):
+        if self.writer is not None:
+            self.writer.close()
+        events = np.concatenate(self.events) if self.events else np.empty(0, dtype=EVENT_DTYPE)
+        track = np.array(self.track, dtype=TRACK_DTYPE)
+        with open(filename, "wb") as f:
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, len(events), len(track),
+                                       len(self.initial)))
+            f.write(self.initial)
+            f.write(zlib.compress(events.tobytes() + track.tobytes(), 6))
+
+
+def load_replay(filename):
+    # (instantané de départ, contacts, trace (pas, balles))
+    with open(filename, "rb") as f:
+        data = f.read()
+    magic, version, n_events, n_steps, taille = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError("replay illisible (format ou version)")
+    debut = REPLAY_HEADER.size
+    initial = data[debut:debut + taille]
+    flux = zlib.decompress(data[debut + taille:])
+    fin_events = n_events * EVENT_DTYPE.itemsize
+    events = np.frombuffer(flux[:fin_events], dtype=EVENT_DTYPE)
+    track = np.frombuffer(flux[fin_events:], dtype=TRACK_DTYPE)
+    return initial, events, track.reshape(n_steps, -1) if n_steps else track.reshape(0, 0)
+
+
+class ReplaySimulation(Simulation):
+    # Simulation rejouée : pendant la phase de jeu, les balles suivent la
+    # trace et les contacts du journal cassent les anneaux puis passent par
+    # Simulation.collisions (scores, notes, comme en direct) ; restent la
+    # rotation et le rétrécissement des anneaux (quelques opérations NumPy
+    # par pas). La fin de partie est la chronologie de Simulation, recalculée depuis l'état de fin de jeu.
+    @classmethod
+    def load(cls, filename, midi_manager=None):
+        initial, events, track = load_replay(filename)
+        sim = decode_state(initial, midi_manager, cls)
+        sim.events = events
+        sim.track = track
+        sim.first_step = sim.step_count
+        sim.event_cursor = 0
+        return sim
+
+    def step_play(self, dt):
+        self.timer -= dt
+        if self.timer <= 0:
+            self.timer = 0
+            self.start_finale()
+            return
+
+        events = self.events
+        debut = fin = self.event_cursor
+        while fin < len(events) and events[fin]["step"] == self.step_count:
+            fin += 1
+        if fin > debut:
+            contacts = events[debut:fin]
+            self.event_cursor = fin
+            for ring in contacts["ring"][contacts["kind"] == BREAK].tolist():
+                self.arcs[ring].broken = True
+            self.collisions.buffer.extend(contacts[list(CONTACT_DTYPE.names)])
+
+        ligne = self.track[self.step_count - self.first_step - 1]
+        np.copyto(self.ball_system.pos, ligne["pos"])
+        np.copyto(self.ball_system.scale, ligne["scale"])
+
+        self.arcs.rotate(dt)
+        if not self.ring_index.has_ring_within(RAYON_DEPART):
+            self.arcs.shrink(dt)
+
+
+def render_replay(filename, output=None, fps=FPS, size=None):
+    # Redessine un replay ; size : côté de l'image exportée (mise à l'échelle)
+    pygame.init()
+    dt = 1.0 / fps
+    sim = ReplaySimulation.load(filename)
+    rendu = Rendu()
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    taille = (size, size) if size else (WIDTH, HEIGHT)
+    exporter = VideoExporter(output, *taille, fps) if output else None
+    image = pygame.Surface(taille) if size else screen
+
+    frames = 0
+    while not sim.finished:
+        sim.advance(dt)
+        rendu.draw(screen, sim)
+        if exporter is not None:
+            if size:
+                pygame.transform.smoothscale(screen, taille, image)
+            exporter.submit(image, frames)
+        frames += 1
+    if exporter is not None:
+        exporter.close()
+    return sim, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendu d'une partie enregistrée, sans refaire la physique")
+    parser.add_argument("replay", help="fichier .replay (headless.py --record)")
+    parser.add_argument("--output", help="fichier vidéo (.mp4 via ffmpeg, sinon .y4m)")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--size", type=int, help="côté de la vidéo exportée (pixels)")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    sim, frames = render_replay(args.replay, args.output, args.fps, args.size)
+    duree = time.perf_counter() - debut
+    yes_score, no_score = sim.scores
+    print(f"{frames} images rejouées en {duree:.2f} s ({frames / duree:.1f} images/s)  "
+          f"Yes : {yes_score}  No : {no_score}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
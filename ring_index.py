@@ -0,0 +1,139 @@
+from operator import attrgetter
+import numpy as np
+from arc_field import ArcField
+from collision_events import BOUNCE, BREAK, CollisionBuffer
+
+_rayon = attrgetter("radius")
+
+# Nombre maximal de contacts traités pour une balle pendant un pas
+MAX_HITS = 16
+
+
+class RingIndex:
+    # Index des anneaux concentriques triés par rayon croissant.
+    # Les anneaux cassés forment toujours un préfixe (une balle ne peut casser
+    # que l'anneau le plus intérieur encore intact), d'où un simple curseur.
+    def __init__(self, arcs, events=None):
+        if isinstance(arcs, ArcField):
+            # Le champ est déjà trié : on cherche directement dans ses tableaux
+            self.field = arcs
+            self.arcs  = arcs.views
+        else:
+            self.field = None
+            self.arcs  = sorted(arcs, key=_rayon)
+        self.center = self.arcs[0].center if self.arcs else None
+        self.cursor = 0
+        # Contacts (anneau, balle, BOUNCE/BREAK) écrits par sweep, traités
+        # après le pas par les consommateurs (collision_events.CollisionBus)
+        self.events = events if events is not None else CollisionBuffer()
+        self.advance()
+
+    def advance(self):
+        # Fait avancer le curseur jusqu'au premier anneau non cassé ; le champ
+        # s'en sert pour sauter le coeur cassé (ArcField.visible)
+        if self.field is not None:
+            broken = self.field.broken
+            while self.cursor < len(broken) and broken[self.cursor]:
+                self.cursor += 1
+            self.field.core = self.cursor
+            return
+        while self.cursor < len(self.arcs) and self.arcs[self.cursor].broken:
+            self.cursor += 1
+
+    def innermost(self):
+        self.advance()
+        if self.cursor < len(self.arcs):
+            return self.arcs[self.cursor]
+        return None
+
+    def has_ring_within(self, radius):
+        # Equivalent de any(not arc.broken and arc.radius <= radius for arc in arcs)
+        arc = self.innermost()
+        return arc is not None and arc.radius <= radius
+
+    def may_hit(self, systeme, marge=1e-6):
+        # Masque (systeme.hit) des balles dont le trajet systeme.start_pos ->
+        # systeme.pos peut toucher l'anneau le plus intérieur. Les autres
+        # restent strictement dans le disque de contact (convexe) ; casser un
+        # anneau n'expose que des anneaux plus grands, le masque reste donc
+        # valable tout le pas. Calculé dans les tampons du système.
+        touche = systeme.hit
+        arc = self.innermost()
+        if arc is None:
+            touche.fill(False)
+            return touche
+        colonnes = systeme.columns
+        contact, d0, d1, dy = systeme.tmp
+        dedans = systeme.masks[0]
+        cx, cy = self.center
+        for d, (x, y) in ((d0, colonnes.start), (d1, colonnes.pos)):
+            np.subtract(x, cx, out=d)
+            np.multiply(d, d, out=d)
+            np.subtract(y, cy, out=dy)
+            np.multiply(dy, dy, out=dy)
+            d += dy
+        np.subtract(arc.radius, systeme.radius, out=contact)
+        contact -= marge
+        np.greater(contact, 0.0, out=touche)
+        np.multiply(contact, contact, out=contact)
+        np.less(d0, contact, out=dedans)
+        touche &= dedans
+        np.less(d1, contact, out=dedans)
+        touche &= dedans
+        np.logical_not(touche, out=touche)
+        return touche
+
+    def sweep(self, balle, depart, dt):
+        # Collision continue sur le trajet depart -> balle.pos parcouru pendant
+        # dt : on cherche l'instant de contact avec l'anneau le plus intérieur,
+        # on casse (trou) et on continue avec le reste du trajet, ou on rebondit
+        # et le pas s'arrête là : le reste réfléchi part vers l'intérieur, et
+        # s'il ressort du disque de contact (trajet presque tangent, anneau
+        # rétréci sur la balle) la balle glisse le long de l'anneau, sa fin est
+        # ramenée sur le cercle de contact. Chaque contact n'est qu'inscrit
+        # dans events : scores, notes et effets viennent après le pas. Renvoie
+        # le nombre d'anneaux cassés.
+        casses = 0
+        events = self.events
+        p   = depart      # Vector2 du départ, remplacé (jamais modifié en place)
+        fin = balle.pos   # copie neuve (BallView)
+        ecoule = 0.0  # fraction du pas déjà parcourue
+
+        for _ in range(MAX_HITS):
+            arc = self.innermost()
+            if arc is None:
+                break
+            s = arc.time_of_impact(p, fin, balle.radius)
+            if s is None:
+                break
+
+            ecoule += (1.0 - ecoule) * s
+            contact = p + (fin - p) * s
+            reste   = fin - contact
+            offset  = contact - self.center
+            if offset.length_squared() == 0:
+                break
+            normal = offset.normalize()
+
+            if arc.is_in_hole(contact, ecoule * dt):
+                arc.broken = True
+                casses += 1
+                events.append(self.cursor, balle.index, BREAK)
+                p = contact
+                continue
+
+            # Contact ramené sur le cercle si la balle chevauchait déjà l'anneau
+            contact = self.center + normal * (arc.radius - balle.radius)
+            if reste.dot(normal) > 0:
+                reste.reflect_ip(normal)
+            arc.bounce(balle, normal)
+            events.append(self.cursor, balle.index, BOUNCE)
+            fin = contact + reste
+            rayon_contact = arc.radius - balle.radius
+            sortie = fin - self.center
+            if sortie.length_squared() > rayon_contact * rayon_contact:
+                fin = self.center + sortie * (rayon_contact / sortie.length())
+            break
+
+        balle.pos = fin
+        return casses
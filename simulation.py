@@ -0,0 +1,276 @@
+import os
+import math
+import numpy as np
+from pygame.math import Vector2
+from balle import Balle
+from ball_system import BallSystem
+from arc_field import ArcField
+from ring_index import RingIndex
+from collision_events import CollisionBus, ScoreConsumer, MidiConsumer
+from spatial_hash import SpatialHash
+from profiler import NULL_PROFILER
+from timeline import Timeline, Phase, Tween, hold, ease_out_cubic
+
+# ========== CONFIGURATION ==========
+WIDTH, HEIGHT = 1080, 1080
+FPS = 60          # fréquence d'affichage
+PHYSICS_HZ = 120  # fréquence des pas physiques (indépendante de l'affichage)
+MAX_FRAME_DT = 0.25  # au-delà, le retard est abandonné (évite la spirale)
+BG_COLOR = (20, 20, 30)
+WHITE = (255, 255, 255)
+
+# Couleurs
+BLUE  = (100, 150, 255)
+RED   = (255,  80,  80)
+GREEN  = (0, 255, 0)  # Vert, même que le score YES
+
+
+# Arcs
+NB_ARCS           = 1000
+RAYON_DEPART      = 100
+ECART_RAYON       = 12
+OUVERTURE_DEGREES = 300
+
+# Balle
+BALL_RADIUS    = 15
+VEL1           = (400/1.5, -500/1.5)   # balle rouge (NO)
+VEL2           = (-400/1.5, -400/1.5)  # balle verte (YES)
+
+# Equipes des deux balles de la fin, dans l'ordre des pistes (1 puis 2)
+FINALE_TEAMS = ("NO", "YES")
+
+# Croissance maximale d'une balle (en pixels de rayon)
+MAX_GROWTH_RADIUS = 100
+
+# Durée de la phase de jeu (en secondes)
+DUREE_PARTIE = 61.0
+
+MIDI_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "musique", "I'm Blue.mid")
+
+
+class Simulation:
+    # Machine à états du jeu ("play" puis les animations de fin), sans
+    # affichage. advance(frame_dt) accumule le temps écoulé et exécute autant
+    # de pas fixes step(physics_dt) que nécessaire.
+    def __init__(self, midi_manager=None, physics_hz=PHYSICS_HZ, vel1=VEL1, vel2=VEL2,
+                 ouverture_degrees=OUVERTURE_DEGREES, ecart_rayon=ECART_RAYON, duree=DUREE_PARTIE,
+                 profiler=NULL_PROFILER, balles=None, broad_phase=None):
+        self.physics_dt  = 1.0 / physics_hz
+        self.accumulator = 0.0
+        self.alpha       = 1.0  # fraction de pas pour l'interpolation à l'affichage
+        self.step_count  = 0    # pas physiques effectués
+        self.midi_manager = midi_manager
+        self.profiler     = profiler
+
+        # Initialisation des balles ; balles remplace les deux balles du jeu
+        # (scènes chargées) : la première balle de chaque équipe joue la fin
+        self.center = (WIDTH // 2, HEIGHT // 2)
+        if balles is None:
+            balles = [Balle(WIDTH // 2 - 100, HEIGHT // 2, BALL_RADIUS, RED, "NO"),
+                      Balle(WIDTH // 2 + 100, HEIGHT // 2, BALL_RADIUS, GREEN, "YES")]
+            balles[0].vel = Vector2(vel1)
+            balles[1].vel = Vector2(vel2)
+        self.ball_system = BallSystem.from_balles(balles)
+        self.balles = self.ball_system.views
+        self.broad_phase = broad_phase if broad_phase is not None else SpatialHash()
+
+        # Création des arcs
+        indices = np.arange(NB_ARCS)
+        start_deg = indices * -5
+        self.arcs = ArcField(self.center,
+                             RAYON_DEPART + indices * ecart_rayon,
+                             np.radians(start_deg),
+                             np.radians(start_deg + ouverture_degrees),
+                             [[BLUE, RED, WHITE][i % 3] for i in range(NB_ARCS)],
+                             midi_manager=midi_manager)
+        # Contacts balles/anneaux d'un pas : scores et notes en un passage
+        # après la physique ; d'autres consommateurs s'abonnent (subscribe)
+        self.collisions = CollisionBus([ScoreConsumer(), MidiConsumer()])
+        self.ring_index = RingIndex(self.arcs, self.collisions.buffer)
+
+        self.yes_score = 0
+        self.no_score = 0
+
+        self.timer = duree
+
+        self.winner_font_timer = 0.0
+        self.winner_font_duration = 2.0
+        self.winner_font_max_size = 120
+
+        self.game_state = "play"
+        # Animations de fin : durées des phases et réglages
+        self.explosion_duration = 1.0
+        self.separation = 300
+        self.align_duration = 1.0
+        self.target_radius = 50
+        self.score_duration = 1.0
+        self.center_move_duration = 1.0
+        # Chronologie de la fin, construite à la fin de la phase de jeu
+        self.finale = None
+        self.finale_step = 0      # pas physique du passage à la fin
+        self.finale_keys = None   # balles 1 et 2 à la fin du jeu : x1, y1, x2, y2, vx1, vy1, vx2, vy2, r1, r2
+        self.finalistes = (None, None)  # balles 1 et 2 (None : équipe sans balle)
+        self.explosion_coef = None
+        self.orig_radii = None
+        self.orig_widths = None
+        self.yes_init = self.no_init = 0
+        self.winner = None
+        self.loser = None
+        self.winner_team = None
+        # Enregistreur optionnel (replay.Recorder), prévenu après chaque pas
+        self.recorder = None
+
+    @property
+    def finished(self):
+        # Vrai quand l'animation "Winner!" est terminée
+        return self.game_state == "done" and self.winner_font_timer <= 0
+
+    @property
+    def scores(self):
+        # Scores (yes, no) de la phase de jeu : l'animation de fin les remet à zéro
+        if self.game_state in ("play", "explode_arcs", "align_balls"):
+            return self.yes_score, self.no_score
+        return self.yes_init, self.no_init
+
+    def advance(self, frame_dt):
+        self.accumulator += min(frame_dt, MAX_FRAME_DT)
+        # La marge absorbe les erreurs d'arrondi : le nombre de pas à un instant
+        # donné ne dépend pas de la fréquence d'affichage
+        while self.accumulator >= self.physics_dt - 1e-9:
+            self.ball_system.store_previous()
+            self.step(self.physics_dt)
+            self.accumulator -= self.physics_dt
+        self.alpha = min(max(self.accumulator / self.physics_dt, 0.0), 1.0)
+
+    def step(self, dt):
+        if self.midi_manager is not None:
+            self.midi_manager.set_clock(self.step_count, self.step_count * dt)
+        self.step_count += 1
+
+        etat = self.game_state
+        if self.game_state == "play":
+            self.step_play(dt)
+        else:
+            self.seek_finale((self.step_count - self.finale_step) * dt)
+        self.collisions.dispatch(self)
+        if self.recorder is not None:
+            self.recorder.on_step(self)
+        self.profiler.lap(etat)
+
+    def step_play(self, dt):
+        self.timer -= dt
+        if self.timer <= 0:
+            self.timer = 0
+            self.start_finale()
+            return
+
+        profiler = self.profiler
+        systeme = self.ball_system
+        departs = systeme.start_pos
+        np.copyto(departs, systeme.pos)
+        profiler.lap("play")
+        systeme.update(dt)
+        systeme.check_bounce_edges(WIDTH, HEIGHT)
+        profiler.lap("physics")
+        # Seules les balles dont le trajet peut atteindre un anneau sont balayées
+        touchent = self.ring_index.may_hit(systeme)
+        if np.count_nonzero(touchent):
+            for i in np.flatnonzero(touchent).tolist():
+                self.ring_index.sweep(self.balles[i], Vector2(departs[i, 0], departs[i, 1]), dt)
+                profiler.lap("collisions")
+        systeme.collide_pairs(self.broad_phase.pairs(systeme))
+        profiler.lap("physics")
+        self.arcs.rotate(dt)
+        if not self.ring_index.has_ring_within(RAYON_DEPART):
+            self.arcs.shrink(dt)
+        profiler.lap("rotate_shrink")
+
+    def start_finale(self):
+        # Fin de la phase de jeu : l'état des balles, des anneaux et les scores
+        # fixent toute la suite, construite une fois en chronologie
+        self.game_state = "explode_arcs"
+        self.finale_step = self.step_count
+        self.orig_radii = self.arcs.radii()
+        self.orig_widths = self.arcs.width.copy()
+        self.yes_init = self.yes_score
+        self.no_init = self.no_score
+        (x1, y1, vx1, vy1, r1), (x2, y2, vx2, vy2, r2) = (
+            (*b.pos, *b.vel, b.radius) if b is not None else (math.nan,) * 5
+            for b in self.finalists())
+        self.finale_keys = np.array([x1, y1, x2, y2, vx1, vy1, vx2, vy2, r1, r2])
+        self.finale = self.build_finale()
+
+    def finalists(self):
+        # Première balle de chaque équipe de FINALE_TEAMS, None si l'équipe
+        # n'en a pas (scène chargée) : sa piste de la fin n'est pas appliquée
+        return tuple(next((b for b in self.balles if b.team == team), None)
+                     for team in FINALE_TEAMS)
+
+    def build_finale(self):
+        # Phases de fin, chaque piste étant une fonction du temps :
+        #   explode_arcs   : les anneaux grossissent et s'épaississent
+        #   align_balls    : les deux balles s'alignent à mi-hauteur et grossissent
+        #   decrease_score : les scores descendent à 0, les balles grossissent
+        #                    selon leur score
+        #   center_winner  : la gagnante rejoint le centre, la perdante disparaît
+        #   done           : affichage "Winner!"
+        self.finalistes = balle1, balle2 = self.finalists()
+        x1, y1, x2, y2, vx1, vy1, vx2, vy2, radius1, radius2 = self.finale_keys.tolist()
+        pos1, pos2 = Vector2(x1, y1), Vector2(x2, y2)
+        target_y = min((p.y for p, b in ((pos1, balle1), (pos2, balle2)) if b is not None),
+                       default=self.center[1])
+        aligne1 = Vector2((WIDTH // 2) + self.separation / 2, target_y)
+        aligne2 = Vector2((WIDTH // 2) - self.separation / 2, target_y)
+
+        max_score = max(self.yes_init, self.no_init)
+        yes_ratio = self.yes_init / max_score if max_score > 0 else 0
+        no_ratio = self.no_init / max_score if max_score > 0 else 0
+        grow1 = self.target_radius + MAX_GROWTH_RADIUS * no_ratio
+        grow2 = self.target_radius + MAX_GROWTH_RADIUS * yes_ratio
+        gagne1 = grow1 > grow2
+        self.winner_team = FINALE_TEAMS[0] if gagne1 else FINALE_TEAMS[1]
+        self.winner, self.loser = (balle1, balle2) if gagne1 else (balle2, balle1)
+        if gagne1:
+            centre = {"pos1": Tween(aligne1, Vector2(self.center), ease_out_cubic),
+                      "radius2": Tween(grow2, 0.0, ease_out_cubic)}
+        else:
+            centre = {"pos2": Tween(aligne2, Vector2(self.center), ease_out_cubic),
+                      "radius1": Tween(grow1, 0.0, ease_out_cubic)}
+
+        arret = Vector2(0, 0)
+        return Timeline([
+            Phase("explode_arcs", self.explosion_duration,
+                  coef=Tween(0.0, 1.0), pos1=hold(pos1), pos2=hold(pos2),
+                  vel1=hold(Vector2(vx1, vy1)), vel2=hold(Vector2(vx2, vy2)),
+                  radius1=hold(radius1), radius2=hold(radius2),
+                  yes=hold(self.yes_init), no=hold(self.no_init), font_timer=hold(0.0)),
+            Phase("align_balls", self.align_duration,
+                  pos1=Tween(pos1, aligne1), pos2=Tween(pos2, aligne2),
+                  vel1=hold(arret), vel2=hold(arret),
+                  radius1=Tween(radius1, self.target_radius), radius2=Tween(radius2, self.target_radius)),
+            Phase("decrease_score", self.score_duration,
+                  yes=Tween(self.yes_init, 0), no=Tween(self.no_init, 0),
+                  radius1=Tween(self.target_radius, grow1), radius2=Tween(self.target_radius, grow2)),
+            Phase("center_winner", self.center_move_duration, **centre),
+            Phase("done", self.winner_font_duration,
+                  font_timer=Tween(self.winner_font_duration, 0.0)),
+        ])
+
+    def seek_finale(self, t):
+        # État de la fin à l'instant t (s depuis la fin de la phase de jeu),
+        # calculé directement : aperçu, navigation ou rendu d'une image isolée
+        phase, values = self.finale.sample(t)
+        self.game_state = phase.name
+
+        if values["coef"] != self.explosion_coef:
+            self.explosion_coef = values["coef"]
+            self.arcs.explode(self.orig_radii, self.orig_widths, self.explosion_coef)
+
+        for balle, piste in zip(self.finalistes, ("1", "2")):
+            if balle is not None:
+                balle.pos = values["pos" + piste]
+                balle.vel = values["vel" + piste]
+                balle.radius = values["radius" + piste]
+        self.yes_score = int(values["yes"])
+        self.no_score = int(values["no"])
+        self.winner_font_timer = values["font_timer"]
@@ -0,0 +1,402 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from balle import GRAVITY, RESTITUTION, MAX_SPEED, BOOST_FACTOR, BOOST_DURATION, SAME_CENTER_NORMAL
+from arc_circle import RAYON_DEPART, ROTATION_SPEED, CONTACT_EPSILON
+from arc_field import SHRINK_SPEED
+from ring_index import MAX_HITS
+from simulation import (Simulation, WIDTH, HEIGHT, NB_ARCS, BALL_RADIUS, PHYSICS_HZ,
+                        VEL1, VEL2, OUVERTURE_DEGREES, ECART_RAYON, DUREE_PARTIE)
+
+DEUX_PI = 2 * np.pi
+
+
+class SimulationLot:
+    # K copies indépendantes de la phase de jeu (deux balles + anneaux),
+    # avancées ensemble en tableaux (K, ...). Mêmes opérations, dans le même
+    # ordre, que Balle / ArcField / RingIndex.sweep, pour retrouver les mêmes
+    # arrondis que le moteur scalaire. Les anneaux cassés forment un préfixe :
+    # un curseur par scénario suffit. Les scénarios terminés sont retirés des
+    # tableaux.
+    def __init__(self, vel1=VEL1, vel2=VEL2, ouverture_degrees=OUVERTURE_DEGREES,
+                 ecart_rayon=ECART_RAYON, duree=DUREE_PARTIE, physics_hz=PHYSICS_HZ, nb_arcs=NB_ARCS):
+        vel1 = np.atleast_2d(np.asarray(vel1, dtype=np.float64))
+        vel2 = np.atleast_2d(np.asarray(vel2, dtype=np.float64))
+        ouverture = np.atleast_1d(np.asarray(ouverture_degrees, dtype=np.float64))
+        ecart     = np.atleast_1d(np.asarray(ecart_rayon, dtype=np.float64))
+        duree     = np.atleast_1d(np.asarray(duree, dtype=np.float64))
+        k = max(len(vel1), len(vel2), len(ouverture), len(ecart), len(duree))
+
+        self.count   = k
+        self.dt      = 1.0 / physics_hz
+        self.nb_arcs = nb_arcs
+        self.center  = np.array([WIDTH // 2, HEIGHT // 2], dtype=np.float64)
+        self.radius  = float(BALL_RADIUS)
+        self.mass    = float(BALL_RADIUS)
+        self.steps   = 0    # rotations effectuées (communes à tous les scénarios)
+        self.turn    = 0.0  # rotation cumulée, comme ArcField.turn
+
+        # Etat par scénario actif ; ids : scénario d'origine de chaque ligne
+        self.ids = np.arange(k)
+        self.pos = np.empty((k, 2, 2))
+        self.pos[:, 0] = (WIDTH // 2 - 100, HEIGHT // 2)
+        self.pos[:, 1] = (WIDTH // 2 + 100, HEIGHT // 2)
+        self.vel = np.empty((k, 2, 2))
+        self.vel[:, 0] = np.broadcast_to(vel1, (k, 2))
+        self.vel[:, 1] = np.broadcast_to(vel2, (k, 2))
+        self.boosting    = np.zeros((k, 2), dtype=bool)
+        self.can_boost   = np.ones((k, 2), dtype=bool)
+        self.boost_timer = np.zeros((k, 2))
+        self.ouverture = np.broadcast_to(ouverture, (k,)).copy()
+        self.ecart     = np.broadcast_to(ecart, (k,)).copy()
+        self.timer     = np.broadcast_to(duree, (k,)).copy()
+        self.cursor    = np.zeros(k, dtype=np.int64)
+
+        # Anneaux, comme dans ArcField : phases et rayons de départ, rotation et
+        # rétrécissement cumulés. La phase de départ et la rotation sont
+        # communes à tous les scénarios, rayons, phase de fin et
+        # rétrécissement non
+        indices = np.arange(nb_arcs)
+        start_deg = indices * -5
+        self.base_radius = RAYON_DEPART + indices * self.ecart[:, None]
+        self.shrunk      = np.zeros(k)
+        self.phase_start = np.mod(np.radians(start_deg), DEUX_PI)
+        self.phase_end   = np.mod(np.radians(start_deg + self.ouverture[:, None]), DEUX_PI)
+        self.yes_score = np.zeros(k, dtype=np.int64)
+        self.no_score  = np.zeros(k, dtype=np.int64)
+
+        # Résultats, indexés par scénario d'origine
+        self.result_yes    = np.zeros(k, dtype=np.int64)
+        self.result_no     = np.zeros(k, dtype=np.int64)
+        self.result_broken = np.zeros(k, dtype=np.int64)
+        self.result_pos    = np.zeros((k, 2, 2))
+        self.result_steps  = np.zeros(k, dtype=np.int64)
+
+    @property
+    def active(self):
+        return len(self.ids)
+
+    # ---------- anneaux ----------
+    def ring_radius(self, rows, cursor):
+        # ArcField.radii pour l'anneau cursor de chaque ligne
+        return np.maximum(self.base_radius[rows, cursor] - self.shrunk[rows], RAYON_DEPART)
+
+    def in_hole(self, rows, cursor, contact, delay):
+        dx = contact[:, 0] - self.center[0]
+        dy = self.center[1] - contact[:, 1]
+        angle = np.mod(np.arctan2(dy, dx) + ROTATION_SPEED * delay, DEUX_PI)
+        start = np.mod(self.phase_start[cursor] - self.turn, DEUX_PI)
+        end   = np.mod(self.phase_end[rows, cursor] - self.turn, DEUX_PI)
+        in_drawn = np.where(start < end,
+                            (start <= angle) & (angle <= end),
+                            (angle >= start) | (angle <= end))
+        return ~in_drawn
+
+    def rotate(self, dt):
+        # ArcField.rotate
+        self.turn += ROTATION_SPEED * dt
+
+    def shrink(self, masque, dt):
+        # ArcField.shrink pour les scénarios du masque (une fois tous les
+        # anneaux à RAYON_DEPART, le rétrécissement cumulé n'a plus d'effet)
+        self.shrunk[masque] += SHRINK_SPEED * dt
+
+    # ---------- balles ----------
+    def clamp_velocity(self, j, rows=slice(None)):
+        v = self.vel[rows, j]
+        speed = np.sqrt(v[:, 0] * v[:, 0] + v[:, 1] * v[:, 1])
+        trop = speed > MAX_SPEED
+        if trop.any():
+            v[trop] *= (MAX_SPEED / speed[trop])[:, None]
+            self.vel[rows, j] = v
+
+    def update(self, j, dt):
+        self.vel[:, j, 1] += GRAVITY * dt
+        self.clamp_velocity(j)
+
+        facteur = np.where(self.boosting[:, j], BOOST_FACTOR, 1.0)
+        self.pos[:, j] += (self.vel[:, j] * facteur[:, None]) * dt
+
+        attente = ~self.can_boost[:, j]
+        self.boost_timer[attente, j] -= dt
+        fin = attente & (self.boost_timer[:, j] <= 0)
+        self.boost_timer[fin, j] = 0.0
+        self.boosting[fin, j] = False
+        self.can_boost[fin, j] = True
+
+    def check_bounce_edges(self, j):
+        p = self.pos[:, j]
+        v = self.vel[:, j]
+        r = self.radius
+        gauche = p[:, 0] - r < 0
+        droite = ~gauche & (p[:, 0] + r > WIDTH)
+        haut   = p[:, 1] - r < 0
+        bas    = ~haut & (p[:, 1] + r > HEIGHT)
+        p[gauche, 0] = r
+        p[droite, 0] = WIDTH - r
+        v[gauche | droite, 0] *= -RESTITUTION
+        p[haut, 1] = r
+        p[bas, 1] = HEIGHT - r
+        v[haut | bas, 1] *= -RESTITUTION
+        rebondi = np.flatnonzero(gauche | droite | haut | bas)
+        if len(rebondi):
+            self.clamp_velocity(j, rebondi)
+
+    def sweep(self, j, depart, dt):
+        # Version vectorisée de RingIndex.sweep
+        k = self.active
+        p   = depart.copy()
+        fin = self.pos[:, j].copy()
+        ecoule = np.zeros(k)
+        casses = np.zeros(k, dtype=np.int64)
+        actif  = np.ones(k, dtype=bool)
+        r = self.radius
+
+        for _ in range(MAX_HITS):
+            actif &= self.cursor < self.nb_arcs
+            rows = np.flatnonzero(actif)
+            if len(rows) == 0:
+                break
+            cur = self.cursor[rows]
+            rayon = self.ring_radius(rows, cur)
+
+            # Instant de contact (ArcCircle.time_of_impact)
+            contact_r = rayon - r
+            ox = p[rows, 0] - self.center[0]
+            oy = p[rows, 1] - self.center[1]
+            dx = fin[rows, 0] - p[rows, 0]
+            dy = fin[rows, 1] - p[rows, 1]
+            a = dx * dx + dy * dy
+            b = ox * dx + oy * dy
+            c = ox * ox + oy * oy - contact_r * contact_r
+            immediat = (c > CONTACT_EPSILON * contact_r * contact_r) | ((c >= 0) & (b > 0))
+            disc = b * b - a * c
+            with np.errstate(divide="ignore", invalid="ignore"):
+                s = (-b + np.sqrt(disc)) / a
+            valide = immediat | ((a != 0) & (disc >= 0) & (s <= 1.0))
+            s = np.where(immediat, 0.0, s)
+
+            actif[rows[~valide]] = False
+            rows, s, cur, rayon = rows[valide], s[valide], cur[valide], rayon[valide]
+            if len(rows) == 0:
+                break
+
+            e = ecoule[rows]
+            e = e + (1.0 - e) * s
+            ecoule[rows] = e
+            depuis = p[rows]
+            contact = depuis + (fin[rows] - depuis) * s[:, None]
+            reste = fin[rows] - contact
+            offset = contact - self.center
+            longueur2 = offset[:, 0] * offset[:, 0] + offset[:, 1] * offset[:, 1]
+            nul = longueur2 == 0
+            if nul.any():
+                actif[rows[nul]] = False
+                keep = ~nul
+                rows, cur, rayon, e, contact, reste, offset, longueur2 = (
+                    rows[keep], cur[keep], rayon[keep], e[keep], contact[keep],
+                    reste[keep], offset[keep], longueur2[keep])
+            normal = offset / np.sqrt(longueur2)[:, None]
+
+            # Passage par le trou : l'anneau casse, le trajet continue
+            trou = self.in_hole(rows, cur, contact, e * dt)
+            casse = rows[trou]
+            self.cursor[casse] += 1
+            casses[casse] += 1
+            p[casse] = contact[trou]
+
+            # Rebond sur la partie pleine (ArcCircle.bounce)
+            plein = ~trou
+            rb = rows[plein]
+            n = normal[plein]
+            contact = self.center + n * (rayon[plein] - r)[:, None]
+            reste = reflect_where(reste[plein], n, np.einsum("ij,ij->i", reste[plein], n) > 0)
+            v = self.vel[rb, j]
+            v = reflect_where(v, n, (v[:, 0] * n[:, 0] + v[:, 1] * n[:, 1]) > 0) * RESTITUTION
+            self.vel[rb, j] = v
+            # Fin du trajet après un rebond, ramenée sur le cercle de contact
+            # si elle en sort (RingIndex.sweep)
+            fin_rb = contact + reste
+            rayon_contact = rayon[plein] - r
+            sortie = fin_rb - self.center
+            l2 = sortie[:, 0] * sortie[:, 0] + sortie[:, 1] * sortie[:, 1]
+            dehors = l2 > rayon_contact * rayon_contact
+            fin_rb[dehors] = self.center + sortie[dehors] * (rayon_contact[dehors] / np.sqrt(l2[dehors]))[:, None]
+            fin[rb] = fin_rb
+            actif[rb] = False
+
+        self.pos[:, j] = fin
+        return casses
+
+    def check_circle_collision(self):
+        offset = self.pos[:, 0] - self.pos[:, 1]
+        dist_sq = offset[:, 0] * offset[:, 0] + offset[:, 1] * offset[:, 1]
+        rayon_min = 2 * self.radius
+        rows = np.flatnonzero(dist_sq < rayon_min ** 2)
+        if len(rows) == 0:
+            return
+
+        offset = offset[rows]
+        longueur = np.sqrt(dist_sq[rows])
+        dist = np.maximum(longueur, 1e-8)
+        overlap = rayon_min - dist
+        normal = offset / np.where(longueur > 0, longueur, 1.0)[:, None]
+        normal[longueur == 0] = SAME_CENTER_NORMAL
+
+        correction = normal * (overlap / 2)[:, None]
+        self.pos[rows, 0] += correction
+        self.pos[rows, 1] -= correction
+
+        rel_vel = self.vel[rows, 0] - self.vel[rows, 1]
+        vel_norm = rel_vel[:, 0] * normal[:, 0] + rel_vel[:, 1] * normal[:, 1]
+        approche = vel_norm < 0
+        rows, normal, vel_norm = rows[approche], normal[approche], vel_norm[approche]
+        if len(rows) == 0:
+            return
+
+        impulse = (2 * vel_norm) / (self.mass + self.mass)
+        self.vel[rows, 0] -= (impulse * self.mass)[:, None] * normal
+        self.vel[rows, 1] += (impulse * self.mass)[:, None] * normal
+        self.clamp_velocity(0, rows)
+        self.clamp_velocity(1, rows)
+
+        for j in (0, 1):
+            boost = rows[self.can_boost[rows, j]]
+            self.boosting[boost, j]    = True
+            self.can_boost[boost, j]   = False
+            self.boost_timer[boost, j] = BOOST_DURATION
+
+    # ---------- boucle ----------
+    def finish(self, termines):
+        ids = self.ids[termines]
+        self.result_yes[ids]    = self.yes_score[termines]
+        self.result_no[ids]     = self.no_score[termines]
+        self.result_broken[ids] = self.cursor[termines]
+        self.result_pos[ids]    = self.pos[termines]
+        self.result_steps[ids]  = self.steps
+
+        garde = ~termines
+        for nom in ("ids", "pos", "vel", "boosting", "can_boost", "boost_timer", "ouverture",
+                    "ecart", "timer", "cursor", "base_radius", "shrunk", "phase_end", "yes_score", "no_score"):
+            setattr(self, nom, getattr(self, nom)[garde])
+
+    def step(self):
+        dt = self.dt
+        self.timer -= dt
+        termines = self.timer <= 0
+        if termines.any():
+            self.finish(termines)
+        if self.active == 0:
+            return
+
+        for j in (0, 1):
+            depart = self.pos[:, j].copy()
+            self.update(j, dt)
+            self.check_bounce_edges(j)
+            casses = self.sweep(j, depart, dt)
+            if j == 1:
+                self.yes_score += casses  # balle verte
+            else:
+                self.no_score += casses
+        self.check_circle_collision()
+
+        self.rotate(dt)
+        self.steps += 1
+        rows = np.arange(self.active)
+        interieur = (self.cursor < self.nb_arcs) & (
+            self.ring_radius(rows, np.minimum(self.cursor, self.nb_arcs - 1)) <= RAYON_DEPART)
+        if not interieur.all():
+            self.shrink(~interieur, dt)
+
+    def run(self):
+        while self.active:
+            self.step()
+        return self.results()
+
+    def results(self):
+        # Le gagnant de l'animation de fin : NO si no > yes, sinon YES
+        return {
+            "yes_score": self.result_yes,
+            "no_score": self.result_no,
+            "winner": np.where(self.result_no > self.result_yes, "NO", "YES"),
+            "rings_broken": self.result_broken,
+        }
+
+
+def reflect_where(v, n, masque):
+    # Vector2.reflect (normale renormalisée si besoin) sur les lignes du masque
+    nn = n[:, 0] * n[:, 0] + n[:, 1] * n[:, 1]
+    n = np.where((nn != 1)[:, None], n / np.sqrt(nn)[:, None], n)
+    dot = v[:, 0] * n[:, 0] + v[:, 1] * n[:, 1]
+    reflechi = v - 2 * n * dot[:, None]
+    return np.where(masque[:, None], reflechi, v)
+
+
+def scalar_results(vel1, vel2, ouverture, ecart, duree, physics_hz=PHYSICS_HZ):
+    # Même scénario avec Simulation (Balle / ArcCircle) pour comparaison
+    sim = Simulation(physics_hz=physics_hz, vel1=vel1, vel2=vel2,
+                     ouverture_degrees=ouverture, ecart_rayon=ecart, duree=duree)
+    while sim.game_state == "play":
+        sim.step(sim.physics_dt)
+    pos = sim.ball_system.pos[:2].copy()
+    return sim.yes_score, sim.no_score, int(sim.arcs.broken.sum()), pos
+
+
+def main():
+    from balayage import COLONNES, parse_valeurs, sample
+
+    parser = argparse.ArgumentParser(description="Simulation en lot de milliers de scénarios (NumPy)")
+    parser.add_argument("--random", type=int, default=1000, help="nombre de scénarios tirés")
+    parser.add_argument("--range", action="append", type=parse_valeurs, default=[],
+                        help="plage des tirages : nom=min:max (répétable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--physics-hz", type=int, default=PHYSICS_HZ)
+    parser.add_argument("--check", type=int, default=0,
+                        help="compare les N premiers scénarios au moteur scalaire")
+    parser.add_argument("--output", help="fichier CSV des résultats")
+    args = parser.parse_args()
+
+    liste = list(sample(dict(args.range), args.random, args.seed))
+    colonne = lambda nom: np.array([p[nom] for p in liste])
+    vel1 = np.stack([colonne("vel1_x"), colonne("vel1_y")], axis=1)
+    vel2 = np.stack([colonne("vel2_x"), colonne("vel2_y")], axis=1)
+
+    debut = time.perf_counter()
+    lot = SimulationLot(vel1, vel2, colonne("ouverture"), colonne("ecart"), colonne("duree"),
+                        physics_hz=args.physics_hz)
+    res = lot.run()
+    duree = time.perf_counter() - debut
+
+    print(f"{len(liste)} scénarios en {duree:.2f} s ({len(liste) / duree:.1f} scénarios/s)", file=sys.stderr)
+    print(f"YES gagne : {np.mean(res['winner'] == 'YES'):.1%}  "
+          f"yes moyen : {res['yes_score'].mean():.1f}  no moyen : {res['no_score'].mean():.1f}  "
+          f"écart |yes - no| médian : {np.median(np.abs(res['yes_score'] - res['no_score'])):.0f}",
+          file=sys.stderr)
+
+    if args.check:
+        identiques = 0
+        ecart_pos = 0.0
+        for i in range(min(args.check, len(liste))):
+            yes, no, casses, pos = scalar_results(tuple(vel1[i]), tuple(vel2[i]), liste[i]["ouverture"],
+                                                  liste[i]["ecart"], liste[i]["duree"], args.physics_hz)
+            identiques += (yes, no, casses) == (res["yes_score"][i], res["no_score"][i], res["rings_broken"][i])
+            ecart_pos = max(ecart_pos, float(np.abs(pos - lot.result_pos[i]).max()))
+        print(f"Contrôle scalaire : {identiques}/{min(args.check, len(liste))} scores identiques, "
+              f"écart de position max {ecart_pos:.3g} px", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLONNES)
+            writer.writeheader()
+            for i, params in enumerate(liste):
+                writer.writerow(dict(params, **{nom: res[nom][i] for nom in res}))
+
+
+if __name__ == "__main__":
+    main()
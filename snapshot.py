@@ -0,0 +1,184 @@
+import math
+import zlib
+import struct
+from functools import reduce
+import numpy as np
+from ball_system import BallSystem
+from arc_field import ArcField
+from ring_index import RingIndex
+from simulation import Simulation
+
+# Instantané binaire de tout l'état d'une Simulation : en-tête, puis
+# scalaires et tableaux (balles, anneaux, fin de partie) bout à bout dans un
+# ordre fixe, compressés par zlib. Les flottants sont gardés en float64 : une
+# simulation restaurée continue exactement comme l'originale.
+STATE_MAGIC   = b"SIMSTATE"
+STATE_VERSION = 2
+STATE_HEADER  = struct.Struct("<8sIBII")  # magic, version, état, balles, anneaux
+
+# Fichier d'instantanés : une suite d'enregistrements (image, taille, données)
+RECORD_HEADER = struct.Struct("<II")
+
+ETATS = ("play", "explode_arcs", "align_balls", "decrease_score", "center_winner", "done")
+
+# Scalaires de la Simulation, en float64 (entiers exacts) ; None -> NaN
+SCALAIRES = ("physics_dt", "accumulator", "alpha", "step_count", "timer", "yes_score", "no_score",
+             "yes_init", "no_init", "finale_step", "winner_font_timer", "explosion_coef",
+             "arcs.turn", "arcs.shrunk")
+ENTIERS   = {"step_count", "yes_score", "no_score", "yes_init", "no_init", "finale_step"}
+EQUIPES   = (None, "YES", "NO")
+
+
+def fields(n, m):
+    # (chemin de l'attribut, dtype, forme) des tableaux, dans l'ordre du fichier
+    return [
+        ("ball_system.pos",            "<f8", (n, 2)),
+        ("ball_system.vel",            "<f8", (n, 2)),
+        ("ball_system.prev_pos",       "<f8", (n, 2)),
+        ("ball_system.radius",         "<f8", (n,)),
+        ("ball_system.mass",           "<f8", (n,)),
+        ("ball_system.restitution",    "<f8", (n,)),
+        ("ball_system.score",          "<i8", (n,)),
+        ("ball_system.boosting",       "?",   (n,)),
+        ("ball_system.can_boost",      "?",   (n,)),
+        ("ball_system.boost_timer",    "<f8", (n,)),
+        ("ball_system.scale",          "<f8", (n, 2)),
+        ("ball_system.target_scale",   "<f8", (n, 2)),
+        ("ball_system.scale_timer",    "<f8", (n,)),
+        ("ball_system.scale_duration", "<f8", (n,)),
+        ("arcs.base_radius",           "<f8", (m,)),
+        ("arcs.phase_start",           "<f8", (m,)),
+        ("arcs.phase_end",             "<f8", (m,)),
+        ("arcs.width",                 "<i4", (m,)),
+        ("arcs.broken",                "?",   (m,)),
+        ("orig_radii",                 "<f8", (m,)),
+        ("orig_widths",                "<i4", (m,)),
+        ("finale_keys",                "<f8", (10,)),
+    ]
+
+
+def _get(sim, chemin):
+    return reduce(getattr, chemin.split("."), sim)
+
+
+def _set(sim, chemin, valeur):
+    objet, _, nom = chemin.rpartition(".")
+    setattr(_get(sim, objet) if objet else sim, nom, valeur)
+
+
+def encode_state(sim):
+    systeme, arcs = sim.ball_system, sim.arcs
+    n, m = len(systeme), len(arcs)
+    scalaires = [math.nan if _get(sim, nom) is None else _get(sim, nom) for nom in SCALAIRES]
+    midi = sim.midi_manager
+    morceaux = [
+        np.array(scalaires, dtype="<f8"),
+        np.array([midi.index, midi.last_note_time] if midi is not None else [math.nan] * 2, dtype="<f8"),
+        np.array([sim.arcs.center.x, sim.arcs.center.y], dtype="<f8"),
+        np.array(systeme.colors, dtype="u1").reshape(n, 3),
+        np.array([EQUIPES.index(t) for t in systeme.teams], dtype="i1"),
+        np.array(arcs.colors, dtype="u1").reshape(m, 3),
+    ]
+    for chemin, dtype, forme in fields(n, m):
+        valeur = _get(sim, chemin)
+        if valeur is None:
+            valeur = np.zeros(forme, dtype=dtype)  # fin de partie pas encore commencée
+        morceaux.append(np.ascontiguousarray(valeur, dtype=dtype).reshape(forme))
+    donnees = zlib.compress(b"".join(a.tobytes() for a in morceaux), 6)
+    return STATE_HEADER.pack(STATE_MAGIC, STATE_VERSION, ETATS.index(sim.game_state), n, m) + donnees
+
+
+def decode_state(data, midi_manager=None, cls=Simulation):
+    # Nouvelle Simulation (ou sous-classe cls) dans l'état enregistré
+    magic, version, etat, n, m = STATE_HEADER.unpack_from(data)
+    if magic != STATE_MAGIC or version != STATE_VERSION:
+        raise ValueError("instantané illisible (format ou version)")
+    flux = memoryview(zlib.decompress(data[STATE_HEADER.size:]))
+
+    def lire(dtype, forme):
+        nonlocal flux
+        dtype = np.dtype(dtype)
+        taille = dtype.itemsize * int(np.prod(forme))
+        valeur = np.frombuffer(flux[:taille], dtype=dtype).reshape(forme).copy()
+        flux = flux[taille:]
+        return valeur
+
+    scalaires = lire("<f8", (len(SCALAIRES),)).tolist()
+    midi = lire("<f8", (2,)).tolist()
+    centre = lire("<f8", (2,)).tolist()
+    couleurs_balles = [tuple(c) for c in lire("u1", (n, 3)).tolist()]
+    equipes = [EQUIPES[i] for i in lire("i1", (n,)).tolist()]
+    couleurs_arcs = [tuple(c) for c in lire("u1", (m, 3)).tolist()]
+    tableaux = {chemin: lire(dtype, forme) for chemin, dtype, forme in fields(n, m)}
+
+    valeurs = dict(zip(SCALAIRES, scalaires))
+    sim = cls(midi_manager=midi_manager, physics_hz=round(1.0 / valeurs["physics_dt"]))
+    sim.ball_system = BallSystem(tableaux["ball_system.pos"], tableaux["ball_system.vel"],
+                                 tableaux["ball_system.radius"], couleurs_balles, equipes)
+    sim.balles = sim.ball_system.views
+    # Rayons croissants à la construction pour garder l'ordre enregistré
+    sim.arcs = ArcField(centre, np.arange(m, dtype=np.float64), np.zeros(m), np.zeros(m),
+                        couleurs_arcs, midi_manager=midi_manager)
+    for chemin, valeur in tableaux.items():
+        if "." in chemin:
+            np.copyto(_get(sim, chemin), valeur)
+    sim.arcs.max_width = int(sim.arcs.width.max()) if m else 0
+    sim.ring_index = RingIndex(sim.arcs, sim.collisions.buffer)
+
+    for nom, valeur in valeurs.items():
+        if nom in ENTIERS:
+            valeur = int(valeur)
+        elif math.isnan(valeur):
+            valeur = None
+        _set(sim, nom, valeur)
+    sim.game_state = ETATS[etat]
+    if sim.game_state != "play":
+        sim.orig_radii = tableaux["orig_radii"]
+        sim.orig_widths = tableaux["orig_widths"]
+        sim.finale_keys = tableaux["finale_keys"]
+        sim.finale = sim.build_finale()
+    if midi_manager is not None and not math.isnan(midi[0]):
+        midi_manager.index = int(midi[0])
+        midi_manager.last_note_time = midi[1]
+    return sim
+
+
+class SnapshotWriter:
+    # Ajoute un instantané par appel de write(frame, sim) au fichier
+    def __init__(self, filename):
+        self.file = open(filename, "wb")
+        self.count = 0
+        self.bytes = 0
+
+    def write(self, frame, sim):
+        donnees = encode_state(sim)
+        self.file.write(RECORD_HEADER.pack(frame, len(donnees)))
+        self.file.write(donnees)
+        self.count += 1
+        self.bytes += RECORD_HEADER.size + len(donnees)
+
+    def close(self):
+        self.file.close()
+
+
+def read_snapshots(filename):
+    # {image: données} de tous les instantanés du fichier
+    instantanes = {}
+    with open(filename, "rb") as f:
+        while True:
+            entete = f.read(RECORD_HEADER.size)
+            if len(entete) < RECORD_HEADER.size:
+                break
+            frame, taille = RECORD_HEADER.unpack(entete)
+            instantanes[frame] = f.read(taille)
+    return instantanes
+
+
+def load_snapshot(filename, frame=None, midi_manager=None):
+    # (image, Simulation) du dernier instantané pris au plus tard à frame
+    instantanes = read_snapshots(filename)
+    images = [i for i in instantanes if frame is None or i <= frame]
+    if not images:
+        raise ValueError(f"aucun instantané avant l'image {frame} dans {filename}")
+    image = max(images)
+    return image, decode_state(instantanes[image], midi_manager)
@@ -0,0 +1,76 @@
+import numpy as np
+from ball_system import BallSystem
+
+
+class SpatialHash:
+    # Phase large des collisions entre balles : grille uniforme dont seules
+    # les cellules occupées sont stockées (dictionnaire). Une balle n'est
+    # comparée qu'aux balles de sa cellule et des cellules voisines, d'où un
+    # coût presque linéaire en nombre de balles. La taille de cellule vaut au
+    # moins le diamètre de la plus grosse balle (par défaut : calculée à
+    # chaque appel).
+    # Cellules voisines visitées depuis chaque cellule : la moitié des 8
+    # voisines suffit, l'autre moitié voit la paire dans l'autre sens
+    VOISINES = ((1, 0), (1, 1), (0, 1), (-1, 1))
+    # En dessous, renvoyer toutes les paires coûte moins cher que la grille
+    # (le test de distance de check_circle_collision fait le tri)
+    PETIT = 8
+
+    def __init__(self, cell_size=None):
+        self.cell_size = cell_size
+        self.tested = 0  # paires candidates renvoyées (cumul)
+        self.toutes = {}  # n -> toutes les paires, pour n <= PETIT (ne pas modifier)
+
+    def pairs(self, balles):
+        # Paires (i, j), i < j, de balles assez proches pour se toucher,
+        # triées comme dans une double boucle (ordre de résolution stable)
+        # balles : liste de Balle ou BallSystem (cellules calculées en tableaux)
+        n = len(balles)
+        if n <= self.PETIT:
+            paires = self.toutes.get(n)
+            if paires is None:
+                paires = self.toutes[n] = [(i, j) for i in range(n) for j in range(i + 1, n)]
+            self.tested += len(paires)
+            return paires
+        if isinstance(balles, BallSystem):
+            taille = self.cell_size or 2 * float(balles.radius.max())
+            cles = map(tuple, np.floor_divide(balles.pos, taille).astype(np.int64).tolist())
+        else:
+            taille = self.cell_size or 2 * max(b.radius for b in balles)
+            cles = ((int(b.pos.x // taille), int(b.pos.y // taille)) for b in balles)
+
+        cellules = {}
+        for i, cle in enumerate(cles):
+            membres = cellules.get(cle)
+            if membres is None:
+                cellules[cle] = [i]
+            else:
+                membres.append(i)
+
+        paires = []
+        for (cx, cy), membres in cellules.items():
+            for k, i in enumerate(membres):
+                for j in membres[k + 1:]:
+                    paires.append((i, j))
+            for dx, dy in self.VOISINES:
+                voisins = cellules.get((cx + dx, cy + dy))
+                if voisins is None:
+                    continue
+                for i in membres:
+                    for j in voisins:
+                        paires.append((i, j) if i < j else (j, i))
+        paires.sort()
+        self.tested += len(paires)
+        return paires
+
+
+class AllPairs:
+    # Toutes les paires (référence pour les mesures, quadratique)
+    def __init__(self):
+        self.tested = 0
+
+    def pairs(self, balles):
+        n = len(balles)
+        paires = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        self.tested += len(paires)
+        return paires
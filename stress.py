@@ -0,0 +1,87 @@
+import os
+import csv
+import sys
+import math
+import time
+import random
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from pygame.math import Vector2
+from balle import Balle
+from arc_circle import RAYON_DEPART
+from spatial_hash import SpatialHash, AllPairs
+from simulation import Simulation, WIDTH, HEIGHT, PHYSICS_HZ, RED, GREEN
+
+COLONNES = ["balls", "broad_phase", "steps", "seconds", "steps_per_s", "ball_steps_per_s",
+            "pairs_per_step", "all_pairs", "yes_score", "no_score"]
+
+
+def stress_balls(n, radius=1.5, speed=400, seed=0):
+    # n balles tirées dans le premier anneau (elles s'y chevauchent au départ),
+    # équipes alternées comme les deux balles du jeu
+    rng = random.Random(seed)
+    balles = []
+    for i in range(n):
+        angle = rng.uniform(0, 2 * math.pi)
+        distance = (RAYON_DEPART - radius - 1) * math.sqrt(rng.random())
+        team = "YES" if i % 2 else "NO"
+        b = Balle(WIDTH // 2 + distance * math.cos(angle), HEIGHT // 2 + distance * math.sin(angle),
+                  radius, GREEN if team == "YES" else RED, team)
+        b.vel = Vector2(rng.uniform(-speed, speed), rng.uniform(-speed, speed))
+        balles.append(b)
+    return balles
+
+
+def run_stress(n, steps, radius=1.5, brute=False, physics_hz=PHYSICS_HZ, seed=0):
+    # Phase de jeu seule, steps pas physiques, sans rendu
+    broad_phase = AllPairs() if brute else SpatialHash()
+    sim = Simulation(physics_hz=physics_hz, balles=stress_balls(n, radius, seed=seed),
+                     broad_phase=broad_phase)
+    debut = time.perf_counter()
+    for _ in range(steps):
+        sim.step(sim.physics_dt)
+    duree = time.perf_counter() - debut
+    return {
+        "balls": n,
+        "broad_phase": "all_pairs" if brute else "spatial_hash",
+        "steps": steps,
+        "seconds": duree,
+        "steps_per_s": steps / duree,
+        "ball_steps_per_s": n * steps / duree,
+        "pairs_per_step": broad_phase.tested / steps,
+        "all_pairs": n * (n - 1) // 2,
+        "yes_score": sim.yes_score,
+        "no_score": sim.no_score,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scène chargée : des centaines à des milliers de balles")
+    parser.add_argument("--balls", type=lambda t: [int(v) for v in t.split(",")], default=[100, 500, 1000, 2000])
+    parser.add_argument("--steps", type=int, default=240, help="pas physiques par scène")
+    parser.add_argument("--radius", type=float, default=1.5)
+    parser.add_argument("--brute", action="store_true", help="mesure aussi toutes les paires (quadratique)")
+    parser.add_argument("--physics-hz", type=int, default=PHYSICS_HZ)
+    parser.add_argument("--output", help="fichier CSV des mesures")
+    args = parser.parse_args()
+
+    lignes = []
+    for n in args.balls:
+        for brute in (False, True) if args.brute else (False,):
+            ligne = run_stress(n, args.steps, args.radius, brute, args.physics_hz)
+            lignes.append(ligne)
+            print(f"{n:>6} balles  {ligne['broad_phase']:<12}  {ligne['steps_per_s']:>8.1f} pas/s  "
+                  f"{ligne['ball_steps_per_s']:>10.0f} balles.pas/s  "
+                  f"{ligne['pairs_per_step']:>9.0f} paires/pas (sur {ligne['all_pairs']})", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLONNES)
+            writer.writeheader()
+            writer.writerows(lignes)
+
+
+if __name__ == "__main__":
+    main()
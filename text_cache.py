@@ -0,0 +1,59 @@
+from collections import OrderedDict
+import pygame
+
+
+class TextCache:
+    # Cache des polices par taille et cache LRU des surfaces de texte rendues
+    # (clé : texte, taille, couleur). Les tailles animées sont arrondies à
+    # size_step pixels pour que les images successives partagent les surfaces.
+    def __init__(self, max_surfaces=256, size_step=2, font_name=None):
+        self.max_surfaces = max_surfaces
+        self.size_step    = size_step
+        self.font_name    = font_name
+        self.fonts    = {}
+        self.surfaces = OrderedDict()
+
+        self.hits       = 0
+        self.misses     = 0
+        self.font_loads = 0
+        self.evictions  = 0
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.SysFont(self.font_name, size)
+            self.fonts[size] = font
+            self.font_loads += 1
+        return font
+
+    def quantize(self, size):
+        return max(self.size_step, int(round(size / self.size_step)) * self.size_step)
+
+    def render(self, text, size, color, animated=False):
+        if animated:
+            size = self.quantize(size)
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.font(size).render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "font_loads": self.font_loads,
+            "evictions": self.evictions,
+            "surfaces": len(self.surfaces),
+        }
@@ -0,0 +1,88 @@
+# Chronologie déclarative : une suite de phases, chacune avec une durée et des
+# pistes (Tween) dont la valeur ne dépend que de l'avancement dans la phase.
+# N'importe quel instant se calcule directement, sans rejouer les précédents :
+# l'état à l'instant t est fait des valeurs finales des phases passées, puis
+# des valeurs de la phase en cours.
+
+EPSILON = 1e-9  # marge sur les fins de phase (temps obtenus par sommes de pas)
+
+
+def linear(p):
+    return p
+
+
+def ease_out_cubic(p):
+    # Départ rapide, arrivée en douceur
+    return 1 - (1 - p) ** 3
+
+
+class Tween:
+    # Valeur de a (début de la phase) à b (fin de la phase). a et b peuvent
+    # être des nombres, des Vector2 ou des tableaux NumPy.
+    def __init__(self, a, b, ease=linear):
+        self.a    = a
+        self.b    = b
+        self.ease = ease
+
+    def at(self, p):
+        # p : avancement entre 0 et 1 ; b exactement à la fin, pour que la
+        # phase suivante reparte de la même valeur
+        if p >= 1.0:
+            return self.b
+        return self.a + (self.b - self.a) * self.ease(p)
+
+
+def hold(value):
+    # Piste constante sur toute la phase
+    return Tween(value, value)
+
+
+class Phase:
+    def __init__(self, name, duration, **tracks):
+        self.name     = name
+        self.duration = duration
+        self.tracks   = tracks
+        self.start    = 0.0  # fixé par la Timeline
+
+    def progress(self, t):
+        # Avancement (0 à 1) au temps local t
+        if self.duration <= 0:
+            return 1.0
+        return min(max(t / self.duration, 0.0), 1.0)
+
+    def sample(self, t, values=None):
+        values = {} if values is None else values
+        p = self.progress(t)
+        for name, track in self.tracks.items():
+            values[name] = track.at(p)
+        return values
+
+
+class Timeline:
+    def __init__(self, phases):
+        self.phases = list(phases)
+        debut = 0.0
+        for phase in self.phases:
+            phase.start = debut
+            debut += phase.duration
+        self.duration = debut
+
+    def phase_at(self, t):
+        # (phase, temps local) à l'instant t depuis le début. Une phase
+        # comprend son instant de fin ; au-delà de la chronologie, la dernière
+        # phase reste à sa fin.
+        for phase in self.phases:
+            if t <= phase.start + phase.duration + EPSILON:
+                return phase, t - phase.start
+        phase = self.phases[-1]
+        return phase, phase.duration
+
+    def sample(self, t):
+        # (phase en cours, {piste: valeur}) à l'instant t
+        phase, local = self.phase_at(t)
+        values = {}
+        for passee in self.phases:
+            if passee is phase:
+                break
+            passee.sample(passee.duration, values)
+        return phase, phase.sample(local, values)
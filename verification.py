@@ -0,0 +1,105 @@
+import os
+import sys
+import pickle
+import argparse
+
+# Pilote vidéo factice : aucune fenêtre
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from balle import Balle
+from ball_system import BallSystem
+from simulation import Simulation, FPS, WIDTH, HEIGHT
+from rendu_parallele import checkpoints
+from benchmark import allocations, over_budget
+
+
+def etat(sim):
+    # Tout ce qui change d'une image à l'autre et se voit au rendu
+    systeme, arcs = sim.ball_system, sim.arcs
+    return (sim.game_state, sim.yes_score, sim.no_score, sim.step_count,
+            systeme.pos.tobytes(), systeme.vel.tobytes(), systeme.radius.tobytes(),
+            systeme.scale.tobytes(), arcs.broken.tobytes(), arcs.base_radius.tobytes(),
+            arcs.width.tobytes(), arcs.turn, arcs.shrunk)
+
+
+def check_pickle(fps=FPS, segment_frames=240):
+    # Rendu par segments (rendu_parallele, finale) : chaque instantané picklé
+    # doit rejouer son segment image par image comme une partie d'un seul
+    # tenant. Renvoie (images différentes, images comparées).
+    dt = 1.0 / fps
+    points, total = checkpoints(fps, segment_frames)
+    sim = Simulation()
+    reference = []
+    while not sim.finished:
+        sim.advance(dt)
+        reference.append(etat(sim))
+
+    ecarts = 0
+    for debut, donnees in points:
+        copie = pickle.loads(donnees)
+        for frame in range(debut, min(debut + segment_frames, total)):
+            copie.advance(dt)
+            ecarts += etat(copie) != reference[frame]
+    return ecarts, total
+
+
+def check_views(frames=600, fps=FPS):
+    # Les méthodes de Balle modifient pos, vel, scale... en place : appliquées
+    # à une BallView, elles doivent écrire dans le système exactement comme
+    # sur une Balle. Renvoie le nombre de pas où les deux divergent.
+    dt = 1.0 / fps
+    balles = [Balle(200, 300, 15, (255, 0, 0)), Balle(800, 900, 40, (0, 0, 255))]
+    balles[0].vel.update(700, -300)
+    balles[1].vel.update(-900, 650)
+    vues = BallSystem.from_balles(balles).views
+    ecarts = 0
+    for _ in range(frames):
+        for b in (*balles, *vues):
+            Balle.store_previous(b)
+            Balle.update(b, dt)
+            Balle.check_bounce_edges(b, WIDTH, HEIGHT)
+        for b, vue in zip(balles, vues):
+            ecarts += any(tuple(getattr(b, nom)) != tuple(getattr(vue, nom))
+                          for nom in ("pos", "vel", "prev_pos", "scale", "target_scale"))
+    return ecarts
+
+
+def check_allocations(rings=100, balls=2):
+    # Budget d'allocation de Simulation.step (benchmark.allocations)
+    return over_budget(allocations(rings, balls), log=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôles à lancer avant un commit "
+                                                 "(code de sortie 1 si l'un échoue)")
+    parser.add_argument("--only", action="append", choices=["pickle", "views", "allocations"],
+                        help="ne lance que ce contrôle (répétable)")
+    args = parser.parse_args()
+    choisis = args.only or ["pickle", "views", "allocations"]
+
+    pygame.init()
+    echecs = []
+    if "pickle" in choisis:
+        ecarts, total = check_pickle()
+        print(f"pickle : {ecarts}/{total} images différentes après reprise d'un instantané")
+        if ecarts:
+            echecs.append("pickle")
+    if "views" in choisis:
+        ecarts = check_views()
+        print(f"vues : {ecarts} pas où une BallView diverge d'une Balle")
+        if ecarts:
+            echecs.append("views")
+    if "allocations" in choisis:
+        depasse = check_allocations()
+        print(f"allocations : {', '.join(depasse) + ' hors budget' if depasse else 'dans le budget'}")
+        if depasse:
+            echecs.append("allocations")
+    pygame.quit()
+    if echecs:
+        print(f"Echec : {', '.join(echecs)}")
+    sys.exit(1 if echecs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import sys
+import time
+import queue
+import shutil
+import threading
+import subprocess
+import numpy as np
+
+
+def pixel_layout(surface):
+    # Ordre des octets d'un pixel de la surface, ex. "bgr0" pour le format
+    # 32 bits par défaut de pygame sur une machine little-endian
+    bytesize = surface.get_bytesize()
+    if bytesize not in (3, 4):
+        raise ValueError(f"Surface de {bytesize} octets par pixel non supportée")
+    masks  = surface.get_masks()
+    shifts = surface.get_shifts()
+    layout = ["0"] * bytesize
+    for canal, mask, shift in zip("rgba", masks, shifts):
+        if mask == 0:
+            continue
+        octet = shift // 8
+        if sys.byteorder == "big":
+            octet = bytesize - 1 - octet
+        layout[octet] = canal
+    return "".join(layout)
+
+
+def ffmpeg_pix_fmt(layout):
+    if len(layout) == 3:
+        return layout + "24"
+    return layout
+
+
+class VideoExporter:
+    # Exporte les images rendues vers un encodeur sur un thread d'écriture.
+    # Chaque image est copiée une seule fois, depuis la vue mémoire de la
+    # surface vers un anneau borné de tampons ; le thread les envoie ensuite à
+    # ffmpeg (par un pipe) ou, sans ffmpeg, dans un fichier .y4m.
+    def __init__(self, filename, width, height, fps, slots=8, block=True, codec_args=None):
+        self.filename = filename
+        self.width    = width
+        self.height   = height
+        self.fps      = fps
+        self.block    = block
+        self.codec_args = codec_args or ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "18"]
+        self.ffmpeg   = shutil.which("ffmpeg")
+
+        self.slots  = slots
+        self.buffers = None  # alloués à la première image (taille = pitch * hauteur)
+        self.layout = None
+        self.pitch  = None
+        self.free   = queue.Queue()
+        self.ready  = queue.Queue()
+        for i in range(slots):
+            self.free.put(i)
+
+        # Compteurs
+        self.frames_submitted   = 0
+        self.frames_written     = 0
+        self.frames_dropped     = 0
+        self.backpressure_waits = 0
+        self.backpressure_time  = 0.0
+        self.max_queued         = 0
+
+        self.process = None
+        self.output  = None
+        self.thread  = None
+        self.error   = None
+
+    def _open(self, surface):
+        self.layout = pixel_layout(surface)
+        self.pitch  = surface.get_pitch()
+        taille = self.pitch * self.height
+        self.buffers = [bytearray(taille) for _ in range(self.slots)]
+
+        if self.ffmpeg:
+            largeur_pitch = self.pitch // surface.get_bytesize()
+            cmd = [self.ffmpeg, "-y", "-loglevel", "error",
+                   "-f", "rawvideo", "-pix_fmt", ffmpeg_pix_fmt(self.layout),
+                   "-s", f"{largeur_pitch}x{self.height}", "-r", str(self.fps),
+                   "-i", "-"]
+            if largeur_pitch != self.width:
+                cmd += ["-vf", f"crop={self.width}:{self.height}:0:0"]
+            cmd += self.codec_args + [self.filename]
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+            self.output  = self.process.stdin
+        else:
+            self.output = open(self.filename, "wb")
+            self.output.write(f"YUV4MPEG2 W{self.width} H{self.height} F{self.fps}:1 "
+                              f"Ip A1:1 C444 XCOLORRANGE=FULL\n".encode("ascii"))
+
+        self.thread = threading.Thread(target=self._writer, name="video-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, surface, frame=None):
+        # frame est accepté pour servir directement de on_frame(screen, frame)
+        if self.thread is None:
+            self._open(surface)
+        self.frames_submitted += 1
+
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            if not self.block:
+                self.frames_dropped += 1
+                return False
+            self.backpressure_waits += 1
+            debut = time.perf_counter()
+            slot = self.free.get()
+            self.backpressure_time += time.perf_counter() - debut
+
+        # Seule copie : mémoire de la surface -> tampon de l'anneau
+        # (get_buffer verrouille la surface jusqu'à la libération de la vue)
+        with memoryview(surface.get_buffer()) as vue:
+            self.buffers[slot][:] = vue
+
+        self.ready.put(slot)
+        self.max_queued = max(self.max_queued, self.ready.qsize())
+        return True
+
+    def _writer(self):
+        try:
+            while True:
+                slot = self.ready.get()
+                if slot is None:
+                    break
+                if self.process is not None:
+                    self.output.write(memoryview(self.buffers[slot]))
+                else:
+                    self._write_y4m(self.buffers[slot])
+                self.frames_written += 1
+                self.free.put(slot)
+        except (BrokenPipeError, OSError) as e:
+            self.error = e
+            # Débloque submit() : les images suivantes seront perdues
+            while True:
+                slot = self.ready.get()
+                if slot is None:
+                    break
+                self.frames_dropped += 1
+                self.free.put(slot)
+
+    def _write_y4m(self, buffer):
+        bytesize = len(self.layout)
+        pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.pitch // bytesize, bytesize)
+        pixels = pixels[:, :self.width].astype(np.float32)
+        r = pixels[..., self.layout.index("r")]
+        g = pixels[..., self.layout.index("g")]
+        b = pixels[..., self.layout.index("b")]
+
+        # BT.601 pleine échelle
+        y = 0.299 * r + 0.587 * g + 0.114 * b
+        u = (b - y) * 0.564 + 128
+        v = (r - y) * 0.713 + 128
+
+        self.output.write(b"FRAME\n")
+        for plan in (y, u, v):
+            self.output.write(np.clip(plan + 0.5, 0, 255).astype(np.uint8).tobytes())
+
+    def stats(self):
+        return {
+            "submitted": self.frames_submitted,
+            "written": self.frames_written,
+            "dropped": self.frames_dropped,
+            "backpressure_waits": self.backpressure_waits,
+            "backpressure_time": self.backpressure_time,
+            "max_queued": self.max_queued,
+            "slots": self.slots,
+        }
+
+    def close(self):
+        if self.thread is not None:
+            self.ready.put(None)
+            self.thread.join()
+        if self.output is not None:
+            try:
+                self.output.close()
+            except BrokenPipeError:
+                pass
+        if self.process is not None:
+            self.process.wait()
+        if self.error is not None:
+            raise self.error